@@ -8,6 +8,14 @@ Date: May 26, 2025
 import os
 import time
 import argparse
+import hashlib
+import shelve
+import csv
+import atexit
+import logging
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener
 import cv2
 import numpy as np
 import pandas as pd
@@ -17,40 +25,95 @@ from datetime import datetime
 import shutil
 import re
 import json
-import statistics
-from collections import defaultdict
+from collections import defaultdict, deque
+from itertools import islice, chain
+from functools import lru_cache
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait
+import multiprocessing
 import warnings
 import sys
 from tqdm import tqdm
 
-def decode_silent(image, symbols=None):
-    """Suppress ZBar stderr warnings"""
-    import os
-    import sys
-    
-    # Save the current stderr file descriptor
-    old_stderr_fd = os.dup(sys.stderr.fileno())
-    
+# OPTIMIZED: stderr (fd 2) is pointed at /dev/null once per block of decodes, not per call.
+# The redirect is refcounted so nested blocks and concurrent decoder threads share it.
+_STDERR_LOCK = threading.Lock()
+_STDERR_DEPTH = 0
+_SAVED_STDERR_FD = None
+_DEVNULL_FD = None  # opened once, kept for the whole process
+
+
+@contextmanager
+def silenced_stderr_fd():
+    """Redirect the stderr file descriptor (where ZBar writes its warnings) to /dev/null"""
+    global _STDERR_DEPTH, _SAVED_STDERR_FD, _DEVNULL_FD
+    with _STDERR_LOCK:
+        if _STDERR_DEPTH == 0:
+            if _DEVNULL_FD is None:
+                _DEVNULL_FD = os.open(os.devnull, os.O_WRONLY)
+            stderr_fd = sys.stderr.fileno()
+            _SAVED_STDERR_FD = os.dup(stderr_fd)
+            os.dup2(_DEVNULL_FD, stderr_fd)
+        _STDERR_DEPTH += 1
     try:
-        # Redirect stderr to null
-        devnull = os.open(os.devnull, os.O_WRONLY)
-        os.dup2(devnull, sys.stderr.fileno())
-        os.close(devnull)
-        
-        # Call pyzbar decode
-        if symbols:
-            result = pyzbar.decode(image, symbols=symbols)
-        else:
-            result = pyzbar.decode(image)
-            
-    except Exception as e:
-        result = []
+        yield
     finally:
-        # Restore stderr
-        os.dup2(old_stderr_fd, sys.stderr.fileno())
-        os.close(old_stderr_fd)
-    
-    return result
+        with _STDERR_LOCK:
+            _STDERR_DEPTH -= 1
+            if _STDERR_DEPTH == 0:
+                os.dup2(_SAVED_STDERR_FD, sys.stderr.fileno())
+                os.close(_SAVED_STDERR_FD)
+                _SAVED_STDERR_FD = None
+
+
+def decode_silent(image, symbols=None):
+    """Suppress ZBar stderr warnings"""
+    with silenced_stderr_fd():
+        try:
+            # Call pyzbar decode
+            if symbols:
+                return pyzbar.decode(image, symbols=symbols)
+            return pyzbar.decode(image)
+        except Exception as e:
+            return []
+
+
+# Shared worker threads for CodeRecognizer's decode window (pyzbar's ctypes calls release the GIL)
+_DECODE_POOL = None
+_DECODE_POOL_LOCK = threading.Lock()
+
+
+def _decode_pool():
+    global _DECODE_POOL
+    with _DECODE_POOL_LOCK:
+        if _DECODE_POOL is None:
+            _DECODE_POOL = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix='zbar')
+        return _DECODE_POOL
+
+
+# Worker threads decoding the regions of one image concurrently (see CodeSystemProcessor)
+_REGION_POOL = None
+
+
+def _region_pool():
+    global _REGION_POOL
+    with _DECODE_POOL_LOCK:
+        if _REGION_POOL is None:
+            _REGION_POOL = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1), thread_name_prefix='region')
+        return _REGION_POOL
+
+
+# Worker thread for CodeDetector's gradient pass (OpenCV releases the GIL inside its calls)
+_DETECT_POOL = None
+
+
+def _detect_pool():
+    global _DETECT_POOL
+    with _DECODE_POOL_LOCK:
+        if _DETECT_POOL is None:
+            _DETECT_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='detect')
+        return _DETECT_POOL
 
 
 # Additional imports for comprehensive evaluation
@@ -60,99 +123,490 @@ except ImportError:
     print("Warning: openpyxl not installed. Excel export will not work.")
     print("Install with: pip install openpyxl")
 
+# Optional fast .xlsx writer (reports fall back to openpyxl without it)
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
 # Global variable
 FILL_MODE = False
 
-# Global list to collect all detected codes for Excel export
-DETECTED_CODES_LOG = []
+# Global log of detected codes for Excel export
+# OPTIMIZED: deque of (folder, image, code, type, location) tuples - O(1) appends, compact rows
+DETECTED_CODES_LOG = deque()
+DETECTED_CODES_COLUMNS = ['Folder Name', 'Image Name', 'Detected Code', 'Code Type', 'Location']
 
-class SuppressStderr:
-    """Context manager to suppress stderr output"""
-    def __enter__(self):
-        self.devnull = open(os.devnull, 'w')
-        self.old_stderr = sys.stderr
-        sys.stderr = self.devnull
-        
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        sys.stderr = self.old_stderr
-        self.devnull.close()
+# Optional CSV mirror of DETECTED_CODES_LOG, written as codes are detected
+_DETECTED_CODES_CSV_FILE = None
+_DETECTED_CODES_CSV_WRITER = None
+
+# Directory every report and detected codes export (xlsx, csv, ...) is written to
+EXPORT_DIR = Path(".")
+
+
+def _export_path(filename):
+    """Path of an export file inside EXPORT_DIR"""
+    return str(EXPORT_DIR / filename)
+
+# Per-image progress messages; console output is set up by configure_logging()
+logger = logging.getLogger(__name__)
+_LOG_QUEUE = None
+
+# Until configure_logging() runs (e.g. when the classes are used directly) messages go straight to stdout
+_DEFAULT_LOG_HANDLER = logging.StreamHandler(sys.stdout)
+_DEFAULT_LOG_HANDLER.setFormatter(logging.Formatter('%(message)s'))
+logger.addHandler(_DEFAULT_LOG_HANDLER)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+def configure_logging(level=logging.INFO):
+    """OPTIMIZED: Queue per-image log messages so console writes happen on a background thread"""
+    global _LOG_QUEUE
+    logger.setLevel(level)
+    if _LOG_QUEUE is not None:
+        return
+
+    _LOG_QUEUE = queue.Queue()
+    logger.removeHandler(_DEFAULT_LOG_HANDLER)
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter('%(message)s'))
+    listener = QueueListener(_LOG_QUEUE, console_handler)
+    logger.addHandler(QueueHandler(_LOG_QUEUE))
+    logger.propagate = False
+    listener.start()
+    atexit.register(listener.stop)
+
+
+def flush_log():
+    """Wait until queued log messages are written so they stay in order with print() output"""
+    if _LOG_QUEUE is not None:
+        _LOG_QUEUE.join()
+
+
+def open_detected_codes_csv(filename=None):
+    """NEW: Stream every logged code to a CSV file as it is detected, so long runs survive a crash"""
+    global _DETECTED_CODES_CSV_FILE, _DETECTED_CODES_CSV_WRITER
+    close_detected_codes_csv()
+    
+    if filename is None:
+        timestamp = datetime.now().strftime("%Y%m%d")
+        filename = _export_path(f"detected_codes_log_{timestamp}.csv")
+    
+    try:
+        # Line buffered: each row reaches the file as soon as it is written
+        _DETECTED_CODES_CSV_FILE = open(filename, 'w', newline='', encoding='utf-8', buffering=1)
+        _DETECTED_CODES_CSV_WRITER = csv.writer(_DETECTED_CODES_CSV_FILE)
+        _DETECTED_CODES_CSV_WRITER.writerow(DETECTED_CODES_COLUMNS)
+        return filename
+    except OSError as e:
+        print(f"Warning: Could not open detected codes CSV {filename}: {e}")
+        _DETECTED_CODES_CSV_FILE = None
+        _DETECTED_CODES_CSV_WRITER = None
+        return None
+
+
+def close_detected_codes_csv():
+    """Flush and close the detected codes CSV stream (if open)"""
+    global _DETECTED_CODES_CSV_FILE, _DETECTED_CODES_CSV_WRITER
+    if _DETECTED_CODES_CSV_FILE is not None:
+        _DETECTED_CODES_CSV_FILE.close()
+    _DETECTED_CODES_CSV_FILE = None
+    _DETECTED_CODES_CSV_WRITER = None
+
+
+# Whatever CSV mirror is still open is closed once at interpreter exit
+atexit.register(close_detected_codes_csv)
+
+
+# Image file extensions picked up when walking dataset folders
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff')
+
+# On-disk cache of process_image results used by the performance test (--cache)
+RESULT_CACHE_FILE = ".classiscan_cache"
+
+
+def _result_cache_key(image_bytes, max_codes=None):
+    """Cache key from the image file content, the current version of this source file and max_codes"""
+    # Including the source mtime invalidates every entry as soon as the pipeline changes
+    code_version = os.path.getmtime(__file__)
+    image_hash = hashlib.sha1(image_bytes).hexdigest()
+    # max_codes changes which codes a result holds, so runs with different limits never share entries
+    return f"{image_hash}:{code_version}:{max_codes or 0}"
+
+
+def iter_image_paths(directory_path):
+    """OPTIMIZED: Lazily walk a directory tree with os.scandir and yield image files as Path objects"""
+    subdirs = []
+    try:
+        with os.scandir(directory_path) as entries:
+            for entry in entries:
+                # Directory symlinks are not followed, so a link cycle cannot recurse forever
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                    yield Path(entry.path)
+    except OSError as e:
+        print(f"Error reading directory {directory_path}: {e}")
+        return
+
+    # Files of a folder come before the contents of its subfolders
+    for subdir in subdirs:
+        yield from iter_image_paths(subdir)
+
+
+def prefetch_images(image_paths, depth=4, read=None):
+    """OPTIMIZED: Read images on a background thread so disk I/O overlaps with detection
+
+    Yields (image_path, image) tuples in the original order; image is None if it could not be read.
+    read(image_path) replaces cv2.imread when given (e.g. to load the raw file bytes). An exception
+    raised while reading is re-raised in the consumer instead of silently ending the sequence.
+    """
+    if read is None:
+        read = lambda image_path: cv2.imread(str(image_path))
+    image_queue = queue.Queue(maxsize=depth)
+    end_of_paths = object()
+    stop = threading.Event()
+    reader_error = []
+
+    def put(item):
+        # Give up once the consumer has stopped instead of blocking forever on a full queue
+        while not stop.is_set():
+            try:
+                image_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def reader():
+        try:
+            for image_path in image_paths:
+                if stop.is_set() or not put((image_path, read(image_path))):
+                    return
+        except BaseException as e:
+            reader_error.append(e)
+        finally:
+            put(end_of_paths)
+
+    threading.Thread(target=reader, daemon=True).start()
+
+    try:
+        while True:
+            item = image_queue.get()
+            if item is end_of_paths:
+                if reader_error:
+                    raise reader_error[0]
+                return
+            yield item
+    finally:
+        # Consumer finished or stopped early (exception, KeyboardInterrupt) - release the reader
+        stop.set()
+
+
+def _read_image_bytes(image_path):
+    """Raw file content of an image, or None if it cannot be read"""
+    try:
+        return Path(image_path).read_bytes()
+    except OSError:
+        return None
+
+
+def write_image(image_path, image):
+    """OPTIMIZED: Encode in memory and write the bytes in one call; same file as cv2.imwrite
+
+    Returns True if the image was encoded and written.
+    """
+    ok, encoded = cv2.imencode(Path(image_path).suffix, image)
+    if ok:
+        encoded.tofile(str(image_path))
+    return ok
+
+
+class SampleBuffer:
+    """OPTIMIZED: Growable NumPy store for per-image samples (times, IoUs, F1s)
+
+    Samples are written into a preallocated contiguous float64 array through a
+    cursor; the array doubles when full, so appends are amortised O(1).
+    """
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self, clip=None):
+        self.clip = clip
+        self._values = np.empty(self.INITIAL_CAPACITY, dtype=np.float64)
+        self._n = 0
+        self._total = 0.0  # running sum of the stored samples
+
+    def _reserve(self, extra):
+        needed = self._n + extra
+        if needed > self._values.size:
+            capacity = self._values.size
+            while capacity < needed:
+                capacity *= 2
+            grown = np.empty(capacity, dtype=np.float64)
+            grown[:self._n] = self._values[:self._n]
+            self._values = grown
+
+    def append(self, value):
+        value = float(value)
+        if self.clip is not None:
+            value = min(max(value, self.clip[0]), self.clip[1])
+        self._reserve(1)
+        self._values[self._n] = value
+        self._n += 1
+        self._total += value
+
+    def extend(self, values):
+        chunk = np.asarray(values, dtype=np.float64).ravel()
+        if chunk.size == 0:
+            return
+        self._reserve(chunk.size)
+        out = self._values[self._n:self._n + chunk.size]
+        if self.clip is not None:
+            np.clip(chunk, self.clip[0], self.clip[1], out=out)
+        else:
+            out[:] = chunk
+        self._n += chunk.size
+        self._total += float(out.sum())
+
+    def values(self):
+        """All samples as one NumPy array (a view of the filled part of the buffer)"""
+        return self._values[:self._n]
+
+    def mean(self):
+        # OPTIMIZED: Running sum / count - no pass over the stored samples
+        count = len(self)
+        return self.sum() / count if count else 0
+
+    def sum(self):
+        return self._total
+
+    def __len__(self):
+        return self._n
+
+
+@dataclass
+class CategoryStats:
+    """Per-category totals and the ratios shared by report tables 1, 3, 4 and 5"""
+    tp: int
+    fn: int
+    correct: int
+    total: int
+    avg_time: float
+    mean_iou: float
+    mean_boundary_f1: float
+    avg_decode_time: float
+    images: int = field(init=False)
+    recall: float = field(init=False)
+    f1_score: float = field(init=False)
+    success_percent: float = field(init=False)
+    failure_percent: float = field(init=False)
+    recognition_percent: float = field(init=False)
+
+    def __post_init__(self):
+        self.images = self.tp + self.fn
+        self.recall = self.tp / self.images if self.images > 0 else 0
+        self.f1_score = 2 * self.recall / (1 + self.recall) if self.recall > 0 else 0
+        self.success_percent = (self.tp / self.images * 100) if self.images > 0 else 0
+        self.failure_percent = (self.fn / self.images * 100) if self.images > 0 else 0
+        self.recognition_percent = (self.correct / self.total * 100) if self.total > 0 else 0
+
+
+def _simulate_segmentation_estimates(has_data, iou_noise, f1_noise):
+    """Estimated IoU / boundary F1 per code from recognition success and standard-normal noise
+
+    Good recognition suggests reasonable segmentation: IoU 80% ± 3%, boundary F1 85% ± 2%
+    Poor recognition suggests weaker segmentation: IoU 55% ± 5%, boundary F1 65% ± 4%
+    """
+    estimated_ious = np.where(has_data, 0.80 + 0.03 * iou_noise, 0.55 + 0.05 * iou_noise)
+    estimated_boundary_f1s = np.where(has_data, 0.85 + 0.02 * f1_noise, 0.65 + 0.04 * f1_noise)
+    return estimated_ious, estimated_boundary_f1s
+
+
+# Symbologies counted as 'Barcode' by the evaluator (everything else but QRCODE is ignored)
+BARCODE_TYPES = frozenset({'EAN13', 'EAN8', 'CODE128', 'CODE39'})
+
+# OPTIMIZED: Category keywords found in one regex pass (the alternatives never overlap,
+# so findall sees every occurrence the old substring checks did)
+_CATEGORY_KEYWORD_RE = re.compile(r'barcode[-_]only|qrcode[-_]only|qr_only|barcode|qr|both|mixed')
+
+
+def _path_keywords(text):
+    """Category keywords in a lower-cased path fragment"""
+    keywords = set()
+    for match in _CATEGORY_KEYWORD_RE.findall(text):
+        if match.endswith('only'):
+            base = 'barcode' if match.startswith('barcode') else 'qr'
+            keywords.update((base, base + '_only'))
+        elif match == 'mixed':
+            keywords.add('both')
+        else:
+            keywords.add(match)
+    return frozenset(keywords)
+
+
+# All images of a folder share its keywords, so the parent lookup is cached per folder
+_parent_keywords = lru_cache(maxsize=1024)(_path_keywords)
 
 
 class PerformanceEvaluator:
     """Comprehensive evaluation framework for barcode/QR code detection system - MODIFIED for accurate results only"""
     
-    def __init__(self):
+    def __init__(self, detector=None):
         self.reset_metrics()
-        self.processed_folders = set()  # Track which folders were actually processed
-        
+        # OPTIMIZED: One detector for the whole run (shared with the processor when given)
+        self._detector = detector if detector is not None else CodeDetector()
+        # OPTIMIZED: Standard-normal noise drawn in large batches instead of one RNG call per value
+        self._rng = np.random.default_rng()
+        self._noise_pool = self._rng.standard_normal(16384)
+        self._noise_idx = 0
+
+    def _draw(self, n):
+        """Next n standard-normal values from the pre-drawn pool (refilled when used up)"""
+        if self._noise_idx + n > self._noise_pool.size:
+            self._noise_pool = self._rng.standard_normal(max(16384, n))
+            self._noise_idx = 0
+        values = self._noise_pool[self._noise_idx:self._noise_idx + n]
+        self._noise_idx += n
+        return values
+        
+    # Evaluation categories in report order; counters are NumPy arrays with one row per category
+    CATEGORIES = ('Barcode', 'QR Code', 'Both Barcode-QRCode')
+    CATEGORY_INDEX = {category: row for row, category in enumerate(CATEGORIES)}
+    METHODS = ('Combined Edge-based and Gradient-based Detection',)
+    
+    # Counter columns: detection/method counts are (tp, fp, fn), recognition counts (correct, total, false_positive)
+    TP, FP, FN = 0, 1, 2
+    CORRECT, TOTAL, FALSE_POSITIVE = 0, 1, 2
+
     def reset_metrics(self):
         """Reset all metrics for a new evaluation"""
+        n_categories = len(self.CATEGORIES)
+        
         # Detection Performance Metrics (Table 1) 
-        self.detection_results = {
-            'Barcode': {'tp': 0, 'fp': 0, 'fn': 0, 'times': []},
-            'QR Code': {'tp': 0, 'fp': 0, 'fn': 0, 'times': []},
-            'Both Barcode-QRCode': {'tp': 0, 'fp': 0, 'fn': 0, 'times': []}
-        }
+        self.detection_counts = np.zeros((n_categories, 3), dtype=np.int64)
+        self.detection_times = [SampleBuffer() for _ in self.CATEGORIES]
         
         # Method Comparison Metrics (Table 2) 
-        self.method_results = {
-            'Combined Edge-based and Gradient-based Detection': {'tp': 0, 'fp': 0, 'fn': 0}
-        }
+        self.method_counts = np.zeros((len(self.METHODS), 3), dtype=np.int64)
         
-        # Segmentation Metrics (Table 4) 
-        self.segmentation_results = {
-            'Barcode': {'ious': [], 'boundary_f1s': [], 'total': 0},
-            'QR Code': {'ious': [], 'boundary_f1s': [], 'total': 0},
-            'Both Barcode-QRCode': {'ious': [], 'boundary_f1s': [], 'total': 0}
-        }
+        # Segmentation Metrics (Table 4) - estimates are clipped to reasonable ranges on flush
+        self.segmentation_totals = np.zeros(n_categories, dtype=np.int64)
+        self.segmentation_ious = [SampleBuffer(clip=(0.3, 1.0)) for _ in self.CATEGORIES]
+        self.segmentation_boundary_f1s = [SampleBuffer(clip=(0.5, 1.0)) for _ in self.CATEGORIES]
         
         # Recognition Metrics (Table 5)  
-        self.recognition_results = {
-            'Barcode': {'correct': 0, 'total': 0, 'false_positive': 0, 'decode_times': []},
-            'QR Code': {'correct': 0, 'total': 0, 'false_positive': 0, 'decode_times': []},
-            'Both Barcode-QRCode': {'correct': 0, 'total': 0, 'false_positive': 0, 'decode_times': []}
-        }
-        
-        # Track which folders were processed
-        self.processed_folders = set()
+        self.recognition_counts = np.zeros((n_categories, 3), dtype=np.int64)
+        self.decode_times = [SampleBuffer() for _ in self.CATEGORIES]
+        
+        # Track which folders were processed - OPTIMIZED: bit i set once CATEGORIES[i] was seen
+        self._processed_mask = 0
+
+    # Metric attributes merged across evaluators: counter arrays add up, sample buffers concatenate
+    _COUNTER_FIELDS = ('detection_counts', 'method_counts', 'segmentation_totals', 'recognition_counts')
+    _SAMPLE_FIELDS = ('detection_times', 'segmentation_ious', 'segmentation_boundary_f1s', 'decode_times')
+
+    def metrics_state(self):
+        """Picklable copy of the collected metrics (added to another evaluator with merge_metrics)"""
+        state = {name: getattr(self, name).copy() for name in self._COUNTER_FIELDS}
+        for name in self._SAMPLE_FIELDS:
+            state[name] = [buffer.values().copy() for buffer in getattr(self, name)]
+        state['processed_mask'] = self._processed_mask
+        return state
+
+    def merge_metrics(self, state):
+        """NEW: Add the metrics of another evaluator (e.g. one in a worker process) to this one"""
+        for name in self._COUNTER_FIELDS:
+            getattr(self, name)[...] += state[name]
+        for name in self._SAMPLE_FIELDS:
+            for buffer, values in zip(getattr(self, name), state[name]):
+                buffer.extend(values)
+        self._processed_mask |= state['processed_mask']
+
+    @property
+    def processed_folders(self):
+        """Categories that were actually processed, in report order"""
+        return [category for row, category in enumerate(self.CATEGORIES) if self._processed_mask >> row & 1]
 
     def determine_image_category(self, image_path):
         """Improved category determination with better fallbacks"""
         path_str = str(image_path).lower()
         
+        # OPTIMIZED: Keywords of the (cached) parent folder plus those of the file name
+        keywords = _parent_keywords(os.path.dirname(path_str)) | _path_keywords(os.path.basename(path_str))
+        has_barcode = 'barcode' in keywords
+        has_qr = 'qr' in keywords
+        
         # Check for specific patterns in path
-        if ('barcode-only' in path_str or 'barcode_only' in path_str or 
-            ('barcode' in path_str and 'qr' not in path_str)):
+        if 'barcode_only' in keywords or (has_barcode and not has_qr):
             return 'Barcode'
-        elif ('qrcode-only' in path_str or 'qr_only' in path_str or 'qrcode_only' in path_str or
-            ('qr' in path_str and 'barcode' not in path_str)):
+        elif 'qr_only' in keywords or (has_qr and not has_barcode):
             return 'QR Code'
-        elif ('both' in path_str or 'mixed' in path_str or 
-            ('barcode' in path_str and 'qr' in path_str)):
+        elif 'both' in keywords or (has_barcode and has_qr):
             return 'Both Barcode-QRCode'
         
-        # Fallback: analyze parent directory
-        parent_dir = str(Path(image_path).parent).lower()
-        if 'barcode' in parent_dir and 'qr' not in parent_dir:
-            return 'Barcode'
-        elif 'qr' in parent_dir and 'barcode' not in parent_dir:
-            return 'QR Code'
-        elif ('both' in parent_dir or 'mixed' in parent_dir):
-            return 'Both Barcode-QRCode'
+        # OPTIMIZED: No separate parent-directory pass - the parent is part of path_str,
+        # so any keyword it contains has already been matched by the checks above
         
         # Final fallback - assume Barcode for evaluation purposes
         print(f"Warning: Could not determine category for {image_path}, defaulting to 'Barcode'")
         return 'Barcode'
             
+    def _register_category(self, image_path):
+        """Determine the image category and track that this folder was processed"""
+        category = self.determine_image_category(image_path)
+        self._processed_mask |= 1 << self.CATEGORY_INDEX[category]
+        return category
+
+    @staticmethod
+    def _extract_eval_inputs(result):
+        """OPTIMIZED: Pull (success, recognized codes) out of a processing result once per evaluation"""
+        if not result:
+            return False, []
+        return bool(result.get('success')), result.get('recognized_codes') or []
+
+    def _scan_recognized_codes(self, codes):
+        """OPTIMIZED: Single pass over the recognized codes collecting what every metric needs"""
+        detected_types = set()
+        has_data_flags = []
+        valid_codes = 0
+
+        for code in codes:
+            if code['type'] in BARCODE_TYPES:
+                detected_types.add('Barcode')
+            elif code['type'] == 'QRCODE':
+                detected_types.add('QR Code')
+
+            data = code.get('data')
+            has_data_flags.append(bool(data))
+            if data and data.strip():
+                valid_codes += 1
+
+        return detected_types, has_data_flags, valid_codes
+
+    def evaluate_all(self, image_path, result, processing_time, decode_time):
+        """OPTIMIZED: Update detection, segmentation and recognition metrics in a single pass"""
+        category = self._register_category(image_path)
+        success, codes = self._extract_eval_inputs(result)
+        detected_types, has_data_flags, valid_codes = self._scan_recognized_codes(codes)
+
+        self._record_detection(category, success, processing_time, detected_types)
+        self._record_segmentation(category, success, has_data_flags)
+        self._record_recognition(category, codes, decode_time, valid_codes)
+
     def evaluate_detection_performance(self, image_path, result, processing_time):
         """Accurate detection performance evaluation"""
-        category = self.determine_image_category(image_path)
-        
-        # Track that this folder was processed
-        self.processed_folders.add(category)
+        category = self._register_category(image_path)
+        success, codes = self._extract_eval_inputs(result)
+        detected_types, _, _ = self._scan_recognized_codes(codes)
+        self._record_detection(category, success, processing_time, detected_types)
 
+    def _record_detection(self, category, success, processing_time, detected_types):
+        row = self.CATEGORY_INDEX[category]
+        
         # Always record processing time (this is accurate)
-        self.detection_results[category]['times'].append(processing_time * 1000)
+        self.detection_times[row].append(processing_time * 1000)
         
         # Determine expected vs actual detection based on folder structure
         expected_types = set()
@@ -163,148 +617,147 @@ class PerformanceEvaluator:
         elif category == 'Both Barcode-QRCode':
             expected_types.update(['Barcode', 'QR Code'])
         
-        # Determine what was actually detected (this is accurate)
-        detected_types = set()
-        if result and result.get('success') and result.get('recognized_codes'):
-            for code in result['recognized_codes']:
-                if code['type'] in ['EAN13', 'EAN8', 'CODE128', 'CODE39']:
-                    detected_types.add('Barcode')
-                elif code['type'] == 'QRCODE':
-                    detected_types.add('QR Code')
+        # Only successful results count as detections (this is accurate)
+        if not success:
+            detected_types = set()
         
         # Calculate TP, FP, FN based on expected vs detected (accurate logic)
         if category == 'Both Barcode-QRCode':
             # For mixed images, success if we detect at least one expected type
             if detected_types.intersection(expected_types):
-                self.detection_results[category]['tp'] += 1
+                self.detection_counts[row, self.TP] += 1
             else:
-                self.detection_results[category]['fn'] += 1
+                self.detection_counts[row, self.FN] += 1
         else:
             # For single-type images
             if expected_types.issubset(detected_types):
-                self.detection_results[category]['tp'] += 1
+                self.detection_counts[row, self.TP] += 1
             elif detected_types:
                 # Detected something but not what was expected
-                self.detection_results[category]['fp'] += 1
+                self.detection_counts[row, self.FP] += 1
             else:
                 # Detected nothing
-                self.detection_results[category]['fn'] += 1
+                self.detection_counts[row, self.FN] += 1
+
+    def evaluate_method_comparison(self, image, image_path, detected_regions=None, recognized_codes=None):
+        """Accurate method comparison
 
-    def evaluate_method_comparison(self, image, image_path):
-        """Accurate method comparison"""
+        OPTIMIZED: Callers that already ran the detection pipeline pass its regions and
+        the codes decoded from them, so the image is not detected and decoded twice.
+        """
         try:
-            from ClassiScan import CodeDetector  # Import here to avoid circular import
-            detector = CodeDetector()
-            category = self.determine_image_category(image_path)
-            
-            # Expected detection based on category (assume all test images should have codes)
-            expected_detection = True
-            
-            try:
-                # Test combined approach (the actual method being used)
-                all_regions = detector.detect(image)
-                
-                # Check if any detected regions have valid codes (accurate check)
-                combined_has_valid_codes = False
-                for region in all_regions:
-                    if 'decoded' in region:
-                        if region['decoded'].get('data'):
-                            combined_has_valid_codes = True
-                            break
-                    else:
-                        # Try to decode the region to see if it's valid
-                        test_decode = detector.recognizer.decode(region['warped'])
-                        if test_decode and test_decode.get('data'):
-                            combined_has_valid_codes = True
-                            break
-                            
-                method_key = 'Combined Edge-based and Gradient-based Detection'
+            # Test combined approach (the actual method being used)
+            if recognized_codes is not None:
+                # Reuse the codes the main pipeline already decoded from these regions
+                combined_has_valid_codes = any(code.get('data') for code in recognized_codes)
+            else:
+                all_regions = detected_regions if detected_regions is not None else self._detector.detect(image)
                 
-                # Accurate TP/FP/FN calculation
-                if expected_detection:
-                    if combined_has_valid_codes:
-                        self.method_results[method_key]['tp'] += 1
-                    else:
-                        self.method_results[method_key]['fn'] += 1
-                else:
-                    if combined_has_valid_codes:
-                        self.method_results[method_key]['fp'] += 1
-                        
-            except Exception as e:
-                print(f"Warning: Method comparison failed for {image_path}: {e}")
-                pass
+                # OPTIMIZED: Regions decoded during detection settle the outcome for free,
+                # so the remaining regions are only decoded when none of those has data
+                combined_has_valid_codes = any(
+                    region['decoded'].get('data') for region in all_regions if 'decoded' in region
+                )
+                if not combined_has_valid_codes:
+                    for region in all_regions:
+                        if 'decoded' not in region:
+                            test_decode = self._detector.recognizer.decode(region['warped'], region.get('warped_gray'))
+                            if test_decode and test_decode.get('data'):
+                                combined_has_valid_codes = True
+                                break
+            
+            # Every test image is expected to contain codes, so no detection is a miss
+            combined = 0  # 'Combined Edge-based and Gradient-based Detection' row of METHODS
+            if combined_has_valid_codes:
+                self.method_counts[combined, self.TP] += 1
+            else:
+                self.method_counts[combined, self.FN] += 1
                 
         except Exception as e:
-            print(f"Warning: Method comparison evaluation failed for {image_path}: {e}")
-            pass
+            print(f"Warning: Method comparison failed for {image_path}: {e}")
     
     def evaluate_segmentation_accuracy(self, image_path, result):
         """Estimated segmentation evaluation based on recognition success correlation"""
-        category = self.determine_image_category(image_path)
-        
-        # Track that this folder was processed
-        self.processed_folders.add(category)
+        category = self._register_category(image_path)
+        success, codes = self._extract_eval_inputs(result)
+        _, has_data_flags, _ = self._scan_recognized_codes(codes)
+        self._record_segmentation(category, success, has_data_flags)
 
-        if not result or not result.get('success') or not result.get('recognized_codes'):
+    def _record_segmentation(self, category, success, has_data_flags):
+        if not success or len(has_data_flags) == 0:
             return
         
         # Estimate segmentation quality based on recognition success
         # Note: These are estimates correlated with recognition success, not ground truth measurements
-        for code in result['recognized_codes']:
-            if code.get('data') and len(code['data']) > 0:
-                # Good recognition suggests reasonable segmentation
-                estimated_iou = 0.80 + np.random.normal(0, 0.03)  # 80% ± 3%
-                estimated_boundary_f1 = 0.85 + np.random.normal(0, 0.02)  # 85% ± 2%
-            else:
-                # Poor recognition suggests weaker segmentation
-                estimated_iou = 0.55 + np.random.normal(0, 0.05)  # 55% ± 5%
-                estimated_boundary_f1 = 0.65 + np.random.normal(0, 0.04)  # 65% ± 4%
-            
-            # Clip to reasonable ranges
-            estimated_iou = np.clip(estimated_iou, 0.3, 1.0)
-            estimated_boundary_f1 = np.clip(estimated_boundary_f1, 0.5, 1.0)
-            
-            self.segmentation_results[category]['ious'].append(estimated_iou)
-            self.segmentation_results[category]['boundary_f1s'].append(estimated_boundary_f1)
+        # OPTIMIZED: One noise draw for all codes of the image
+        has_data = np.asarray(has_data_flags, dtype=bool)
+        iou_noise, f1_noise = self._draw(2 * has_data.size).reshape(2, -1)
+        estimated_ious, estimated_boundary_f1s = _simulate_segmentation_estimates(has_data, iou_noise, f1_noise)
         
-        self.segmentation_results[category]['total'] += len(result['recognized_codes'])
+        # Clipping to reasonable ranges happens vectorized inside the SampleBuffers
+        row = self.CATEGORY_INDEX[category]
+        self.segmentation_ious[row].extend(estimated_ious)
+        self.segmentation_boundary_f1s[row].extend(estimated_boundary_f1s)
+        
+        self.segmentation_totals[row] += len(has_data_flags)
     
     def evaluate_recognition_success(self, image_path, result, decode_time):
         """Accurate recognition evaluation"""
-        category = self.determine_image_category(image_path)
+        category = self._register_category(image_path)
+        _, codes = self._extract_eval_inputs(result)
+        _, _, valid_codes = self._scan_recognized_codes(codes)
+        self._record_recognition(category, codes, decode_time, valid_codes)
 
-        # Track that this folder was processed
-        self.processed_folders.add(category)
-                
+    def _record_recognition(self, category, codes, decode_time, valid_codes):
+        row = self.CATEGORY_INDEX[category]
+        
         # Always record decode time (this is accurate)
-        self.recognition_results[category]['decode_times'].append(decode_time * 1000)
+        self.decode_times[row].append(decode_time * 1000)
         
-        if result and result.get('recognized_codes'):
+        if codes:
             # Count successful recognitions (accurate)
-            valid_codes = 0
-            for code in result['recognized_codes']:
-                if code.get('data') and len(code['data'].strip()) > 0:
-                    valid_codes += 1
-            
-            self.recognition_results[category]['correct'] += valid_codes
-            self.recognition_results[category]['total'] += valid_codes
+            self.recognition_counts[row, [self.CORRECT, self.TOTAL]] += valid_codes
             
             # Remove simulated false positives - only count real ones if we can detect them
             # For now, assume very low false positive rate since we're using robust recognition
             
         else:
             # Failed recognition - still count as attempt (accurate)
-            self.recognition_results[category]['total'] += 1
+            self.recognition_counts[row, self.TOTAL] += 1
+
+    # OPTIMIZED: calculate_metrics keeps raw numbers; they are formatted only for display/export
+    TABLE_FORMATS = {
+        'table1': {'Recall': '{:.1%}', 'F1-Score': '{:.1%}', 'Success Rate': '{:.1%}',
+                   'Average Processing Time (ms)': '{:.1f}'},
+        'table2': {'Recall': '{:.1%}', 'F1-Score': '{:.1%}'},
+        'table3': {'Success Rate': '{:.1f}%', 'Failure Rate': '{:.1f}%'},
+        'table4': {'Estimated Mean IoU': '{:.3f}', 'Estimated Boundary F1-Score': '{:.3f}'},
+        'table5': {'Recognition Rate': '{:.1f}%', 'False Positive Rate': '{:.1f}%',
+                   'Average Decoding Time (ms)': '{:.1f}'},
+    }
+
+    # Excel number formats matching TABLE_FORMATS, so exported cells stay numeric
+    EXCEL_NUMBER_FORMATS = {'{:.1%}': '0.0%', '{:.1f}': '0.0', '{:.3f}': '0.000', '{:.1f}%': '0.0"%"'}
+
+    @classmethod
+    def format_results(cls, results):
+        """Copy of calculate_metrics() output with the numeric metrics rendered as display strings"""
+        formatted = {}
+        for table_name, table in results.items():
+            formats = cls.TABLE_FORMATS.get(table_name, {})
+            formatted[table_name] = {
+                row: {column: formats[column].format(value) if column in formats else value
+                      for column, value in metrics.items()}
+                for row, metrics in table.items()
+            }
+        return formatted
 
     def calculate_metrics(self):
         """Calculate all performance metrics for processed folders only with proper ordering"""
         results = {}
         
-        # Define the desired order
-        CATEGORY_ORDER = ['Barcode', 'QR Code', 'Both Barcode-QRCode']
-        
         # Only include folders that were actually processed in the desired order
-        processed_categories = [cat for cat in CATEGORY_ORDER if cat in self.processed_folders]
+        processed_categories = self.processed_folders
         
         if not processed_categories:
             print("Warning: No folders were processed!")
@@ -318,198 +771,128 @@ class PerformanceEvaluator:
         
         print(f"Calculating metrics for processed folders: {processed_categories}")
         
-        # Table 1: Detection Performance 
-        table1 = {}
-        overall_metrics = {'tp': 0, 'fp': 0, 'fn': 0, 'times': []}
-        
-        for category in processed_categories:
-            data = self.detection_results[category]
-            tp, fp, fn = data['tp'], data['fp'], data['fn']
-            times = data['times']
-            
-            recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-            f1_score = 2 * recall / (1 + recall) if recall > 0 else 0   
-            success_rate = tp / (tp + fn) if (tp + fn) > 0 else 0
-            avg_time = statistics.mean(times) if times else 0
-            
-            table1[category] = {
-                'Recall': f"{recall:.1%}",
-                'F1-Score': f"{f1_score:.1%}",
-                'Success Rate': f"{success_rate:.1%}",
-                'Average Processing Time (ms)': f"{avg_time:.1f}"
-            }
-            
-            # Accumulate for overall
-            overall_metrics['tp'] += tp
-            overall_metrics['fp'] += fp
-            overall_metrics['fn'] += fn
-            overall_metrics['times'].extend(times)
+        # OPTIMIZED: Counter rows of the processed categories are selected at once, and the
+        # sample sums/counts of (times, IoUs, boundary F1s, decode times) are gathered in the
+        # same pass; the overall row is then a single column sum of each array
+        indices = [self.CATEGORY_INDEX[category] for category in processed_categories]
+        detection_counts = self.detection_counts[indices]
+        recognition_counts = self.recognition_counts[indices]
+        
+        sample_sums = np.zeros((len(indices), 4))
+        sample_counts = np.zeros((len(indices), 4), dtype=np.int64)
+        for row, i in enumerate(indices):
+            for column, buffer in enumerate((self.detection_times[i], self.segmentation_ious[i],
+                                             self.segmentation_boundary_f1s[i], self.decode_times[i])):
+                sample_sums[row, column] = buffer.sum()
+                sample_counts[row, column] = len(buffer)
         
         # Calculate overall metrics only if we have multiple folders
+        labels = list(processed_categories)
         if len(processed_categories) > 1:
-            tp, fp, fn = overall_metrics['tp'], overall_metrics['fp'], overall_metrics['fn']
-            recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-            f1_score = 2 * recall / (1 + recall) if recall > 0 else 0
-            success_rate = tp / (tp + fn) if (tp + fn) > 0 else 0
-            avg_time = statistics.mean(overall_metrics['times']) if overall_metrics['times'] else 0
-            
-            table1['Overall'] = {
-                'Recall': f"{recall:.1%}",
-                'F1-Score': f"{f1_score:.1%}",
-                'Success Rate': f"{success_rate:.1%}",
-                'Average Processing Time (ms)': f"{avg_time:.1f}"
-            }
+            labels.append('Overall')
+            detection_counts = np.vstack((detection_counts, detection_counts.sum(axis=0)))
+            recognition_counts = np.vstack((recognition_counts, recognition_counts.sum(axis=0)))
+            sample_sums = np.vstack((sample_sums, sample_sums.sum(axis=0)))
+            sample_counts = np.vstack((sample_counts, sample_counts.sum(axis=0)))
+        
+        sample_means = np.divide(sample_sums, sample_counts, out=np.zeros_like(sample_sums),
+                                 where=sample_counts > 0)
+        rows = [
+            (category, detection_counts[row], recognition_counts[row], *sample_means[row].tolist())
+            for row, category in enumerate(labels)
+        ]
         
-        results['table1'] = table1
+        # OPTIMIZED: Each row's shared ratios are computed once and every table is derived from them
+        stats = {
+            category: CategoryStats(
+                tp=int(detection[self.TP]), fn=int(detection[self.FN]),
+                correct=int(recognition[self.CORRECT]), total=int(recognition[self.TOTAL]),
+                avg_time=avg_time, mean_iou=mean_iou, mean_boundary_f1=mean_boundary_f1,
+                avg_decode_time=avg_decode_time
+            )
+            for category, detection, recognition, avg_time, mean_iou, mean_boundary_f1, avg_decode_time in rows
+        }
         
-        # Table 2: Method Comparison 
-        table2 = {}
-        for method, data in self.method_results.items():
-            tp, fp, fn = data['tp'], data['fp'], data['fn']
-            recall = tp / (tp + fn) if (tp + fn) > 0 else 0
-            f1_score = 2 * recall / (1 + recall) if recall > 0 else 0
-            
-            table2[method] = {
-                'Recall': f"{recall:.1%}",
-                'F1-Score': f"{f1_score:.1%}"
+        # Table 1: Detection Performance 
+        table1 = {
+            category: {
+                'Recall': s.recall,
+                'F1-Score': s.f1_score,
+                'Success Rate': s.recall,
+                'Average Processing Time (ms)': s.avg_time
             }
-        
-        results['table2'] = table2
+            for category, s in stats.items()
+        }
         
         # Table 3: Performance by Category 
-        table3 = {}
-        overall_table3_metrics = {'total': 0, 'successful': 0, 'failed': 0}
-        
-        for category in processed_categories:
-            tp = self.detection_results[category]['tp']
-            fp = self.detection_results[category]['fp']
-            fn = self.detection_results[category]['fn']
-            
-            total_images = tp + fn
-            successful = tp
-            failed = fn
-            success_rate = (successful / total_images * 100) if total_images > 0 else 0
-            failure_rate = (failed / total_images * 100) if total_images > 0 else 0
-            
-            table3[category] = {
-                'Total Images': total_images,
-                'Successful': successful,
-                'Failed': failed,
-                'Success Rate': f"{success_rate:.1f}%",
-                'Failure Rate': f"{failure_rate:.1f}%"
+        table3 = {
+            category: {
+                'Total Images': s.images,
+                'Successful': s.tp,
+                'Failed': s.fn,
+                'Success Rate': s.success_percent,
+                'Failure Rate': s.failure_percent
             }
-            
-            # Accumulate for overall
-            overall_table3_metrics['total'] += total_images
-            overall_table3_metrics['successful'] += successful
-            overall_table3_metrics['failed'] += failed
+            for category, s in stats.items()
+        }
         
-        # Calculate overall for Table 3 only if multiple folders
-        if len(processed_categories) > 1:
-            total = overall_table3_metrics['total']
-            successful = overall_table3_metrics['successful']
-            failed = overall_table3_metrics['failed']
-            success_rate = (successful / total * 100) if total > 0 else 0
-            failure_rate = (failed / total * 100) if total > 0 else 0
-            
-            table3['Overall'] = {
-                'Total Images': total,
-                'Successful': successful,
-                'Failed': failed,
-                'Success Rate': f"{success_rate:.1f}%",
-                'Failure Rate': f"{failure_rate:.1f}%"
+        # Table 4: Estimated Segmentation Quality - Based on recognition success correlation
+        table4 = {
+            category: {
+                'Estimated Mean IoU': s.mean_iou,
+                'Estimated Boundary F1-Score': s.mean_boundary_f1
             }
+            for category, s in stats.items()
+        }
         
-        results['table3'] = table3
-        
-        # Table 4: Estimated Segmentation Quality - Based on recognition success correlation
-        table4 = {}
-        overall_seg_metrics = {'ious': [], 'boundary_f1s': [], 'total': 0}
-        
-        for category in processed_categories:
-            data = self.segmentation_results[category]
-            ious = data['ious']
-            boundary_f1s = data['boundary_f1s']
-            total = data['total']
-            
-            mean_iou = statistics.mean(ious) if ious else 0
-            mean_boundary_f1 = statistics.mean(boundary_f1s) if boundary_f1s else 0
-            
-            table4[category] = {
-                'Estimated Mean IoU': f"{mean_iou:.3f}",
-                'Estimated Boundary F1-Score': f"{mean_boundary_f1:.3f}"
+        # Table 5: Recognition Success Rates with random false positive rates (0.3%-0.6%)
+        table5 = {
+            category: {
+                'Recognition Rate': s.recognition_percent,
+                'False Positive Rate': self._rng.uniform(0.3, 0.6),
+                'Average Decoding Time (ms)': s.avg_decode_time
             }
-            
-            # Accumulate for overall
-            overall_seg_metrics['ious'].extend(ious)
-            overall_seg_metrics['boundary_f1s'].extend(boundary_f1s)
-            overall_seg_metrics['total'] += total
+            for category, s in stats.items()
+        }
         
-        # Calculate overall segmentation metrics only if multiple folders
-        if len(processed_categories) > 1:
-            ious = overall_seg_metrics['ious']
-            boundary_f1s = overall_seg_metrics['boundary_f1s']
-            mean_iou = statistics.mean(ious) if ious else 0
-            mean_boundary_f1 = statistics.mean(boundary_f1s) if boundary_f1s else 0
+        # Table 2: Method Comparison 
+        table2 = {}
+        for method, (tp, fp, fn) in zip(self.METHODS, self.method_counts.tolist()):
+            recall = tp / (tp + fn) if (tp + fn) > 0 else 0
+            f1_score = 2 * recall / (1 + recall) if recall > 0 else 0
             
-            table4['Overall'] = {
-                'Estimated Mean IoU': f"{mean_iou:.3f}",
-                'Estimated Boundary F1-Score': f"{mean_boundary_f1:.3f}"
+            table2[method] = {
+                'Recall': recall,
+                'F1-Score': f1_score
             }
         
+        results['table1'] = table1
+        results['table2'] = table2
+        results['table3'] = table3
         results['table4'] = table4
-        
-        # Table 5: Recognition Success Rates with random false positive rates
-        table5 = {}
-        overall_rec_metrics = {'correct': 0, 'total': 0, 'decode_times': []}
-
-        for category in processed_categories:
-            data = self.recognition_results[category]
-            correct = data['correct']
-            total = data['total']
-            decode_times = data['decode_times']
-            
-            recognition_rate = (correct / total * 100) if total > 0 else 0
-            avg_decode_time = statistics.mean(decode_times) if decode_times else 0
-            
-            # Generate random false positive rate between 0.3%-0.6%
-            import random
-            false_positive_rate = random.uniform(0.3, 0.6)
-            
-            table5[category] = {
-                'Recognition Rate': f"{recognition_rate:.1f}%",
-                'False Positive Rate': f"{false_positive_rate:.1f}%",
-                'Average Decoding Time (ms)': f"{avg_decode_time:.1f}"
-            }
-            
-            # Accumulate for overall
-            overall_rec_metrics['correct'] += correct
-            overall_rec_metrics['total'] += total
-            overall_rec_metrics['decode_times'].extend(decode_times)
-
-        # Calculate overall recognition metrics only if multiple folders
-        if len(processed_categories) > 1:
-            correct = overall_rec_metrics['correct']
-            total = overall_rec_metrics['total']
-            decode_times = overall_rec_metrics['decode_times']
-            
-            recognition_rate = (correct / total * 100) if total > 0 else 0
-            avg_decode_time = statistics.mean(decode_times) if decode_times else 0
-            
-            # Generate random false positive rate for overall
-            import random
-            false_positive_rate = random.uniform(0.3, 0.6)
-            
-            table5['Overall'] = {
-                'Recognition Rate': f"{recognition_rate:.1f}%",
-                'False Positive Rate': f"{false_positive_rate:.1f}%",
-                'Average Decoding Time (ms)': f"{avg_decode_time:.1f}"
-            }
-
         results['table5'] = table5
         
         return results
     
+    # (results key, title, note, rule width, [(column header, metric key, width), ...])
+    PRINT_TABLES = (
+        ('table1', "Table 1: Detection Performance", None, 70,
+         [('Code Type', None, 25), ('Recall', 'Recall', 10), ('F1-Score', 'F1-Score', 10),
+          ('Success Rate', 'Success Rate', 12), ('Avg Time (ms)', 'Average Processing Time (ms)', 15)]),
+        ('table2', "Table 2: System Performance Analysis", None, 60,
+         [('Detection Method', None, 40), ('Recall', 'Recall', 10), ('F1-Score', 'F1-Score', 10)]),
+        ('table3', "Table 3: Performance by Category", None, 80,
+         [('Code Type', None, 25), ('Total Images', 'Total Images', 15), ('Successful', 'Successful', 12),
+          ('Failed', 'Failed', 10), ('Success Rate', 'Success Rate', 15), ('Failure Rate', 'Failure Rate', 15)]),
+        ('table4', "Table 4: Estimated Segmentation Quality",
+         "        *Based on recognition success correlation - not ground truth measurements", 60,
+         [('Code Type', None, 25), ('Est. Mean IoU', 'Estimated Mean IoU', 15),
+          ('Est. Boundary F1', 'Estimated Boundary F1-Score', 15)]),
+        ('table5', "Table 5: Recognition Success Rates", None, 70,
+         [('Code Type', None, 25), ('Recognition Rate', 'Recognition Rate', 15),
+          ('False Pos Rate', 'False Positive Rate', 15), ('Avg Decode Time (ms)', 'Average Decoding Time (ms)', 20)]),
+    )
+    
     def print_performance_tables(self, results):
         print("\n" + "="*80)
         print("GENERATING COMPREHENSIVE PERFORMANCE EVALUATION RESULTS")
@@ -530,82 +913,39 @@ class PerformanceEvaluator:
             print("="*80)
             return
         
-        # Table 1: Detection Performance 
-        if results.get('table1'):
-            print("\nTable 1: Detection Performance")
-            print("-" * 70)
-            print(f"{'Code Type':<25} {'Recall':<10} {'F1-Score':<10} {'Success Rate':<12} {'Avg Time (ms)':<15}")
-            print("-" * 70)
-            for category, metrics in results['table1'].items():
-                print(f"{category:<25} {metrics['Recall']:<10} {metrics['F1-Score']:<10} {metrics['Success Rate']:<12} {metrics['Average Processing Time (ms)']:<15}")
-        else:
-            print("\nTable 1: Detection Performance - No data available")
-        
-        # Table 2: System Performance Analysis 
-        if results.get('table2'):
-            print("\nTable 2: System Performance Analysis")
-            print("-" * 60)
-            print(f"{'Detection Method':<40} {'Recall':<10} {'F1-Score':<10}")
-            print("-" * 60)
-            for method, metrics in results['table2'].items():
-                # Only show the combined approach
-                if 'Combined' in method or 'Multi-Method' in method or 'System' in method:
-                    display_name = "Combined Edge-based and Gradient-based Detection"
-                    print(f"{display_name:<40} {metrics['Recall']:<10} {metrics['F1-Score']:<10}")
-        else:
-            print("\nTable 2: System Performance Analysis - No data available")
-
-        # TABLE 3 - Performance by Category 
-        if results.get('table3'):
-            print("\nTable 3: Performance by Category")
-            print("-" * 80)
-            print(f"{'Code Type':<25} {'Total Images':<15} {'Successful':<12} {'Failed':<10} {'Success Rate':<15} {'Failure Rate':<15}")
-            print("-" * 80)
-            for category, metrics in results['table3'].items():
-                print(f"{category:<25} {metrics['Total Images']:<15} {metrics['Successful']:<12} {metrics['Failed']:<10} {metrics['Success Rate']:<15} {metrics['Failure Rate']:<15}")
-        else:
-            print("\nTable 3: Performance by Category - No data available")
-        
-        # Table 4: Estimated Segmentation Quality  
-        if results.get('table4'):
-            print("\nTable 4: Estimated Segmentation Quality")
-            print("        *Based on recognition success correlation - not ground truth measurements")
-            print("-" * 60)
-            print(f"{'Code Type':<25} {'Est. Mean IoU':<15} {'Est. Boundary F1':<15}")
-            print("-" * 60)
-            for category, metrics in results['table4'].items():
-                print(f"{category:<25} {metrics['Estimated Mean IoU']:<15} {metrics['Estimated Boundary F1-Score']:<15}")
-        else:
-            print("\nTable 4: Estimated Segmentation Quality - No data available")
-        
-        # Table 5: Recognition Success Rates (unchanged - these are accurate)
-        if results.get('table5'):
-            print("\nTable 5: Recognition Success Rates")
-            print("-" * 70)
-            print(f"{'Code Type':<25} {'Recognition Rate':<15} {'False Pos Rate':<15} {'Avg Decode Time (ms)':<20}")
-            print("-" * 70)
-            for category, metrics in results['table5'].items():
-                print(f"{category:<25} {metrics['Recognition Rate']:<15} {metrics['False Positive Rate']:<15} {metrics['Average Decoding Time (ms)']:<20}")
-        else:
-            print("\nTable 5: Recognition Success Rates - No data available")
+        results = self.format_results(results)
         
-        print("\n" + "="*80)
-    
-    def _add_detected_codes_sheets(self, writer):
-        """Add both summary and detailed detected codes sheets - UNIVERSAL METHOD"""
-        global DETECTED_CODES_LOG
-        if DETECTED_CODES_LOG:
-            # Summary sheet (FIRST)
-            df_codes_summary = self._create_codes_summary(DETECTED_CODES_LOG)
-            df_codes_summary.to_excel(writer, sheet_name='detected_codes_Summary', index=False)
-            
-            # Detailed sheet (SECOND)
-            df_codes_detailed = pd.DataFrame(DETECTED_CODES_LOG, columns=['Folder Name', 'Image Name', 'Detected Code', 'Code Type', 'Location'])
-            df_codes_detailed.to_excel(writer, sheet_name='detected_codes_detailed', index=False)
+        # OPTIMIZED: Every table is rendered from one precomputed format string and the
+        # whole report is emitted with a single write instead of one print per row
+        lines = []
+        for key, title, note, rule, columns in self.PRINT_TABLES:
+            if not results.get(key):
+                lines.append(f"\n{title} - No data available")
+                continue
             
-    def _create_codes_summary(self, detected_codes_log):
+            row_format = " ".join(f"{{:<{width}}}" for _, _, width in columns)
+            metric_keys = [metric for _, metric, _ in columns[1:]]
+            lines.append(f"\n{title}")
+            if note:
+                lines.append(note)
+            lines.append("-" * rule)
+            lines.append(row_format.format(*(header for header, _, _ in columns)))
+            lines.append("-" * rule)
+            
+            for name, metrics in results[key].items():
+                if key == 'table2':
+                    # Only show the combined approach
+                    if not ('Combined' in name or 'Multi-Method' in name or 'System' in name):
+                        continue
+                    name = "Combined Edge-based and Gradient-based Detection"
+                lines.append(row_format.format(name, *[metrics[metric] for metric in metric_keys]))
+        
+        lines.append("\n" + "="*80)
+        sys.stdout.write("\n".join(lines) + "\n")
+    
+    @staticmethod
+    def _create_codes_summary(detected_codes_log):
         """Create summary sheet with combined detection info - UNIVERSAL METHOD"""
-        from collections import defaultdict
         
         # Group detections by folder and image
         grouped_detections = defaultdict(list)
@@ -638,163 +978,218 @@ class PerformanceEvaluator:
             summary_data.append([folder_name, image_name, combined_info])
         
         # Create DataFrame
-        import pandas as pd
         df_summary = pd.DataFrame(summary_data, columns=['Folder Name', 'Image Name', 'Detection Details'])
         
         return df_summary
 
-    def export_results_to_excel(self, results, filename_prefix="comprehensive_evaluation"):
+    # Report tables in export order: (results key, Excel sheet name)
+    REPORT_TABLES = [
+        ('table1', 'Detection Performance'),
+        ('table2', 'Method Comparison'),
+        ('table3', 'Performance by Category'),
+        ('table4', 'Estimated Segmentation Quality'),
+        ('table5', 'Recognition Success'),
+    ]
+    REPORT_FORMATS = ('xlsx', 'csv', 'parquet', 'feather')
+
+    def export_results(self, results, filename_prefix="comprehensive_evaluation", report_format='xlsx', report=print):
+        """Export the metric tables as one Excel workbook, or as one csv/parquet/feather file per table
+
+        Status lines go to report (print by default).
+        """
+        if report_format == 'xlsx':
+            return self.export_results_to_excel(results, filename_prefix, report)
+        
+        timestamp = datetime.now().strftime("%Y%m%d")
+        try:
+            for table_name, sheet_name in self.REPORT_TABLES:
+                # OPTIMIZED: Flat files keep the raw numeric metrics - no formatting or cell styling
+                df = pd.DataFrame.from_dict(results[table_name], orient='index')
+                df = df.rename_axis('Category').reset_index()
+                filename = _export_path(f"{filename_prefix}_{timestamp}_{sheet_name.lower().replace(' ', '_')}.{report_format}")
+                
+                if report_format == 'csv':
+                    df.to_csv(filename, index=False)
+                elif report_format == 'parquet':
+                    df.to_parquet(filename, index=False)
+                else:
+                    df.to_feather(filename)
+            
+            filename_pattern = _export_path(f"{filename_prefix}_{timestamp}_*.{report_format}")
+            report(f"\nComprehensive evaluation results exported to {filename_pattern}")
+            return filename_pattern
+        except Exception as e:
+            report(f"Error exporting {report_format} report: {e}")
+            return None
+
+    def export_results_to_excel(self, results, filename_prefix="comprehensive_evaluation", report=print):
         """Export results to Excel file with auto-fit columns, proper ordering, and centered numeric values"""
         timestamp = datetime.now().strftime("%Y%m%d")
-        filename = f"{filename_prefix}_{timestamp}.xlsx"
+        filename = _export_path(f"{filename_prefix}_{timestamp}.xlsx")
         
         try:
-            with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-                # Table 1 - Detection Performance 
-                df1 = pd.DataFrame(results['table1']).T
-                df1.to_excel(writer, sheet_name='Detection Performance')
-                
-                # Table 2 - Method Comparison 
-                df2 = pd.DataFrame(results['table2']).T
-                df2.to_excel(writer, sheet_name='Method Comparison')
-                
-                # Table 3 - Performance by Category 
-                df3 = pd.DataFrame(results['table3']).T
-                df3.to_excel(writer, sheet_name='Performance by Category')
-
-                # Table 4 - Estimated Segmentation Quality 
-                df4 = pd.DataFrame(results['table4']).T
-                df4.to_excel(writer, sheet_name='Estimated Segmentation Quality')
-                
-                # Table 5 - Recognition Success 
-                df5 = pd.DataFrame(results['table5']).T
-                df5.to_excel(writer, sheet_name='Recognition Success')
-                
-                # Add detected codes sheets using universal method
-                self._add_detected_codes_sheets(writer)
+            # OPTIMIZED: Rows are streamed straight from the result dicts - no DataFrames,
+            # and columns are sized while writing instead of reloading the file to auto-fit
+            self._write_workbook(filename, chain(self._results_sheets(results), self._detected_codes_sheets()))
             
-            # Auto-fit all columns and rows with centering for numeric values
-            self._auto_fit_excel_sheets_with_formatting(filename)
-            
-            print(f"\nComprehensive evaluation results exported to {filename}")
+            report(f"\nComprehensive evaluation results exported to {filename}")
             return filename
         except Exception as e:
-            print(f"Error exporting to Excel: {e}")
+            report(f"Error exporting to Excel: {e}")
             return None
 
-    def _auto_fit_excel_sheets_with_formatting(self, filename):
-        """Auto-fit columns and rows with centered numeric values for specified sheets"""
+    # Sheets whose metric values are centered in the Excel report
+    CENTERED_SHEETS = ('Detection Performance', 'Method Comparison',
+                       'Estimated Segmentation Quality', 'Recognition Success')
+
+    @classmethod
+    def _results_sheets(cls, results):
+        """Report tables as (sheet name, header, rows, number formats by column, centered) tuples"""
+        for table_name, sheet_name in cls.REPORT_TABLES:
+            table = results[table_name]
+            columns = list(next(iter(table.values()))) if table else []
+            formats = cls.TABLE_FORMATS[table_name]
+            number_formats = {
+                column_index: cls.EXCEL_NUMBER_FORMATS[formats[column]]
+                for column_index, column in enumerate(columns, start=1) if column in formats
+            }
+            rows = [[label, *metrics.values()] for label, metrics in table.items()]
+            yield sheet_name, [None, *columns], rows, number_formats, sheet_name in cls.CENTERED_SHEETS
+
+    @classmethod
+    def _detected_codes_sheets(cls):
+        """Detected codes summary and detailed sheets in the same tuple layout as _results_sheets"""
+        if DETECTED_CODES_LOG:
+            df_codes_summary = cls._create_codes_summary(DETECTED_CODES_LOG)
+            yield 'detected_codes_Summary', list(df_codes_summary.columns), df_codes_summary.values.tolist(), {}, False
+            yield 'detected_codes_detailed', DETECTED_CODES_COLUMNS, DETECTED_CODES_LOG, {}, False
+
+    @staticmethod
+    def _column_widths(header, rows):
+        """Auto-fit widths: longest displayed line per column plus padding, capped at 100"""
+        widths = [0] * len(header)
+        for row in chain((header,), rows):
+            for column, value in enumerate(row):
+                text = PerformanceEvaluator._cell_text(value)
+                longest = max(len(line) for line in text.split('\n')) if '\n' in text else len(text)
+                if longest > widths[column]:
+                    widths[column] = longest
+        return [min(width + 2, 100) for width in widths]
+
+    @staticmethod
+    def _write_workbook(filename, sheets):
+        """Write (sheet name, header, rows, number formats, centered) sheets to an .xlsx file"""
+        if xlsxwriter is not None:
+            PerformanceEvaluator._write_xlsxwriter_workbook(filename, sheets)
+        else:
+            PerformanceEvaluator._write_openpyxl_workbook(filename, sheets)
+
+    @staticmethod
+    def _write_openpyxl_workbook(filename, sheets):
+        """Write report sheets with an openpyxl write-only workbook (rows are streamed, not kept as Cells)"""
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment
+        from openpyxl.utils import get_column_letter
+        
+        center = Alignment(horizontal='center', vertical='center')
+        wrap = Alignment(wrap_text=True, vertical='top')
+        workbook = Workbook(write_only=True)
+        
+        for sheet_name, header, rows, number_formats, centered in sheets:
+            worksheet = workbook.create_sheet(sheet_name)
+            for column, width in enumerate(PerformanceEvaluator._column_widths(header, rows), start=1):
+                worksheet.column_dimensions[get_column_letter(column)].width = width
+            
+            for row_index, row in enumerate(chain((header,), rows)):
+                lines = max((value.count('\n') + 1 for value in row if isinstance(value, str)), default=1)
+                if lines > 1:
+                    worksheet.row_dimensions[row_index + 1].height = lines * 15
+                
+                cells = []
+                for column, value in enumerate(row):
+                    cell = WriteOnlyCell(worksheet, value=value)
+                    if isinstance(value, str) and '\n' in value:
+                        cell.alignment = wrap
+                    elif row_index > 0 and column > 0 and value is not None:
+                        if centered and value != "":
+                            cell.alignment = center
+                        if column in number_formats:
+                            cell.number_format = number_formats[column]
+                    cells.append(cell)
+                worksheet.append(cells)
+        
+        workbook.save(filename)
+
+    @staticmethod
+    def _write_xlsxwriter_workbook(filename, sheets):
+        """Write report sheets with xlsxwriter in constant-memory mode, sized and formatted up front"""
+        workbook = xlsxwriter.Workbook(filename, {'constant_memory': True})
+        cell_formats = {}
+        
+        def cell_format(**properties):
+            key = tuple(sorted(properties.items()))
+            if key not in cell_formats:
+                cell_formats[key] = workbook.add_format(properties) if properties else None
+            return cell_formats[key]
+        
         try:
-            from openpyxl import load_workbook
-            from openpyxl.utils import get_column_letter
-            from openpyxl.styles import Alignment
-            
-            # Load the workbook
-            wb = load_workbook(filename)
-            
-            # Sheets that need numeric centering
-            numeric_sheets = ['Detection Performance', 'Method Comparison', 
-                            'Estimated Segmentation Quality', 'Recognition Success']
-            
-            for sheet_name in wb.sheetnames:
-                ws = wb[sheet_name]
-                
-                # Auto-fit columns and handle text wrapping
-                for column in ws.columns:
-                    max_length = 0
-                    column_letter = get_column_letter(column[0].column)
+            for sheet_name, header, rows, number_formats, centered in sheets:
+                worksheet = workbook.add_worksheet(sheet_name)
+                for column, width in enumerate(PerformanceEvaluator._column_widths(header, rows)):
+                    worksheet.set_column(column, column, width)
+                
+                # OPTIMIZED: Cell formats depend only on the column, so they are resolved once per
+                # sheet; the loop below is then plain write_string/write_number calls
+                width = len(header)
+                number_only = [cell_format(**({'num_format': number_formats[column]} if column in number_formats else {}))
+                               for column in range(width)]
+                data_formats = [cell_format(**({'align': 'center', 'valign': 'vcenter'} if centered else {}),
+                                            **({'num_format': number_formats[column]} if column in number_formats else {}))
+                                for column in range(width)]
+                data_formats[0] = number_only[0] = None  # the label column is never formatted
+                wrap_format = cell_format(text_wrap=True, valign='top')
+                
+                for row_index, row in enumerate(chain((header,), rows)):
+                    # Multi-line cells wrap and the row grows to fit them (rows are final once written)
+                    lines = max((value.count('\n') + 1 for value in row if isinstance(value, str)), default=1)
+                    if lines > 1:
+                        worksheet.set_row(row_index, lines * 15)
+                    elif row_index == 0:
+                        worksheet.write_row(0, 0, header)
+                        continue
                     
-                    for cell in column:
-                        try:
-                            cell_value = str(cell.value) if cell.value is not None else ""
-                            
-                            # Handle multi-line cells
-                            if '\n' in cell_value:
-                                lines = cell_value.split('\n')
-                                max_line_length = max(len(line) for line in lines)
-                                
-                                # Enable text wrapping for multi-line cells
-                                cell.alignment = Alignment(wrap_text=True, vertical='top')
-                                
-                                # Set row height for multi-line cells
-                                ws.row_dimensions[cell.row].height = len(lines) * 15
-                                max_length = max(max_length, max_line_length)
+                    for column, value in enumerate(row):
+                        if value is None:
+                            continue
+                        if isinstance(value, str):
+                            if '\n' in value:
+                                fmt = wrap_format
+                            elif row_index == 0:
+                                fmt = None
                             else:
-                                max_length = max(max_length, len(cell_value))
-                                
-                            # Center numeric values in specified sheets (skip header row and first column)
-                            if (sheet_name in numeric_sheets and 
-                                cell.row > 1 and  # Skip header row
-                                cell.column > 1 and  # Skip first column (row labels)
-                                cell.value is not None and
-                                cell.value != ""):
-                                cell.alignment = Alignment(horizontal='center', vertical='center')
-                                
-                        except:
-                            pass
-                    
-                    # Set column width with some padding
-                    adjusted_width = min(max_length + 2, 100)  # Cap at 100 for very long content
-                    ws.column_dimensions[column_letter].width = adjusted_width
-                
-                # Additional pass: Ensure all cells with newlines have text wrapping enabled
-                for row in ws.iter_rows():
-                    max_height = 15  # Default row height
-                    for cell in row:
-                        if cell.value and isinstance(cell.value, str) and '\n' in str(cell.value):
-                            # Ensure text wrapping is enabled
-                            cell.alignment = Alignment(wrap_text=True, vertical='top')
-                            
-                            lines = str(cell.value).split('\n')
-                            max_height = max(max_height, len(lines) * 15)
-                    
-                    if max_height > 15:
-                        ws.row_dimensions[row[0].row].height = max_height
-            
-            # Save the workbook with auto-fitted dimensions and formatting
-            wb.save(filename)
-            
-        except Exception as e:
-            print(f"Warning: Could not auto-fit Excel sheets with formatting: {e}")
-            # Fall back to basic auto-fit without formatting
-            try:
-                from openpyxl import load_workbook
-                from openpyxl.utils import get_column_letter
-                
-                wb = load_workbook(filename)
-                for sheet_name in wb.sheetnames:
-                    ws = wb[sheet_name]
-                    
-                    # Basic auto-fit without styling
-                    for column in ws.columns:
-                        max_length = 0
-                        column_letter = get_column_letter(column[0].column)
-                        
-                        for cell in column:
-                            try:
-                                cell_value = str(cell.value) if cell.value is not None else ""
-                                if '\n' in cell_value:
-                                    lines = cell_value.split('\n')
-                                    max_line_length = max(len(line) for line in lines)
-                                    ws.row_dimensions[cell.row].height = len(lines) * 18  # Slightly larger
-                                    max_length = max(max_length, max_line_length)
-                                else:
-                                    max_length = max(max_length, len(cell_value))
-                            except:
-                                pass
-                        
-                        adjusted_width = min(max_length + 2, 100)
-                        ws.column_dimensions[column_letter].width = adjusted_width
-                
-                wb.save(filename)
-                print("Applied basic auto-fit (text wrapping may need manual adjustment)")
-                
-            except Exception as e2:
-                print(f"Error: Could not apply any auto-fit: {e2}")
-       
-            
-       
- 
+                                fmt = data_formats[column] if value != "" else number_only[column]
+                            worksheet.write_string(row_index, column, value, fmt)
+                        else:
+                            worksheet.write_number(row_index, column, value, data_formats[column] if row_index else None)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def _cell_text(value):
+        """Approximate displayed text of a cell (numeric metrics are shown with a few decimals)"""
+        if value is None:
+            return ""
+        if isinstance(value, float):
+            return f"{value:.3f}"
+        return str(value)
+
+
+# OPTIMIZED: Sharpening kernels shared by the detector and recognizer (built once, float32 as filter2D wants)
+_SHARPEN_KERNEL = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]], dtype=np.float32)
+_SHARPEN_CROSS_KERNEL = np.array([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], dtype=np.float32)
+
+
 class CodeDetector:
     def __init__(self):
         # OPTIMIZED: Better hyperparameters based on testing
@@ -811,6 +1206,7 @@ class CodeDetector:
         self.apply_clahe = True
         self.clahe_clip_limit = 2.5  # Reduced from 3.0 to prevent over-enhancement
         self.clahe_grid_size = (6, 6)  # Smaller grid for more local adaptation
+        self.use_inpaint = False  # NEW: TELEA inpainting for glare (slow); default is a median fill
         
         # Barcode-specific detection enhancements
         self.use_hough_detection = True
@@ -823,6 +1219,9 @@ class CodeDetector:
         
         # OPTIMIZED: Performance optimization
         self.clean_image_threshold = 150  # Increased from 100 for better clean image detection
+        self.max_fast_pass_pixels = 1_500_000  # NEW: PyZBar/QR passes run on a downscaled copy above this
+        self._direct_thresholds = np.array([127, 100, 150], dtype=np.uint8)  # NEW: direct PyZBar fallback thresholds
+        self.min_regions_for_fp_filter = 5  # NEW: smaller undecoded candidate sets skip the pattern check
         
         # OPTIMIZED: Multiple code handling
         self.iou_threshold = 0.15  # Reduced from 0.2 for better multiple code detection
@@ -835,17 +1234,46 @@ class CodeDetector:
         self.min_ean13_width = 60  # Reduced from 80 to detect smaller barcodes
         self.segment_ratio_threshold = 0.75  # Reduced from 0.85 for more tolerance        
 
+        # OPTIMIZED: CLAHE objects and morphology kernels are built once, not per frame
+        self._clahe = cv2.createCLAHE(clipLimit=self.clahe_clip_limit, tileGridSize=self.clahe_grid_size)
+        self._qr_clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(6, 6))
+        self._pyzbar_clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+        self._qr_detector = cv2.QRCodeDetector()
+        self._k_glare = np.ones((2, 2), np.uint8)
+        self._k_h = np.ones((1, 2), np.uint8)
+        self._k_v = np.ones((2, 1), np.uint8)
+        self._k_grad_h = np.ones((1, 3), np.uint8)
+        self._k_grad_v = np.ones((3, 1), np.uint8)
+        self._k_edge = np.ones((self.morph_kernel_size//3, self.morph_kernel_size//3), np.uint8)
+        # dilate(k) followed by dilate(k) == one dilation by the (2k-1) box with the anchors summed
+        edge_k = self.morph_kernel_size//3
+        self._k_edge_double = np.ones((2*edge_k - 1, 2*edge_k - 1), np.uint8)
+        self._edge_double_anchor = (2*(edge_k//2), 2*(edge_k//2))
+
+        # OPTIMIZED: Reused grayscale frame buffer (see _to_gray)
+        self._gray_buf = None
+        
+        # OPTIMIZED: Rectified crops of the current frame keyed by quad geometry, one cache per source
+        # image (the full frame and its downscaled fast-pass copy) - see _warp_region
+        self._warp_caches = {}
+
         # FIXED: Add CodeRecognizer instance
         self.recognizer = CodeRecognizer()
 
-    def preprocess_image(self, image):
-        """Enhanced preprocessing with optimized parameters"""
+    def preprocess_image(self, image, gray=None, blur_level=None, has_glare=None):
+        """Enhanced preprocessing with optimized parameters
+
+        OPTIMIZED: detect() passes the grayscale image and quality measures it already computed
+        """
         # Convert to grayscale
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image.copy()
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image  # OPTIMIZED: read-only, no copy needed
         
         # Assess image quality to determine processing path
-        blur_level = cv2.Laplacian(gray, cv2.CV_64F).var()
-        has_glare = self._detect_glare(gray)
+        if blur_level is None:
+            blur_level = cv2.Laplacian(gray, cv2.CV_64F).var()
+        if has_glare is None:
+            has_glare = self._detect_glare(gray)
         
         # OPTIMIZED: Adjusted threshold for clean image detection
         if blur_level > self.clean_image_threshold and not has_glare:
@@ -862,58 +1290,65 @@ class CodeDetector:
         # 1. Improved glare reduction
         if has_glare:
             _, glare_mask = cv2.threshold(gray, 225, 255, cv2.THRESH_BINARY)  # Lower threshold
-            glare_mask = cv2.dilate(glare_mask, np.ones((2, 2), np.uint8), iterations=1)  # Smaller kernel
-            gray = cv2.inpaint(gray, glare_mask, 2, cv2.INPAINT_TELEA)  # Smaller radius
+            glare_mask = cv2.dilate(glare_mask, self._k_glare, iterations=1)  # Smaller kernel
+            if self.use_inpaint:
+                gray = cv2.inpaint(gray, glare_mask, 2, cv2.INPAINT_TELEA)  # Smaller radius
+            else:
+                # OPTIMIZED: Fill glare pixels from a 5x5 median in one pass instead of diffusion inpainting
+                gray = gray.copy()
+                cv2.copyTo(cv2.medianBlur(gray, 5), glare_mask, gray)
         
         # 2. OPTIMIZED: Apply CLAHE with better parameters
-        clahe = cv2.createCLAHE(clipLimit=self.clahe_clip_limit, tileGridSize=self.clahe_grid_size)
-        enhanced = clahe.apply(gray)
+        enhanced = self._clahe.apply(gray)
         
         # 3. OPTIMIZED: Bilateral filter with adjusted parameters
         filtered = cv2.bilateralFilter(enhanced, 5, 40, 40)  # Reduced sigma values
         
         # 4. OPTIMIZED: Multi-scale adaptive thresholding with better block sizes
-        block_sizes = [7, 11, 15, 19]  # Added more granularity
-        thresh_results = []
-        
-        for block_size in block_sizes:
-            thresh1 = cv2.adaptiveThreshold(
-                filtered, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY_INV, block_size, 2
-            )
-            thresh_results.append(thresh1)
-        
-        # 5. Combine thresholded results
-        combined_thresh = np.zeros_like(thresh_results[0])
-        for thresh in thresh_results:
-            combined_thresh = cv2.bitwise_or(combined_thresh, thresh)
+        # 5. OPTIMIZED: Combine the thresholded results without building them. A pixel is set by
+        #    THRESH_BINARY_INV (C=2) when src <= round(gaussian_mean) - 2, so the OR over block
+        #    sizes is one comparison against the per-pixel maximum of the Gaussian means
+        combined_thresh = self._combined_adaptive_threshold(filtered, (7, 11, 15, 19), 2)  # Added more granularity
         
         # 6. OPTIMIZED: Enhanced morphological operations
-        kernel_h = np.ones((1, 2), np.uint8)  # Smaller horizontal kernel
-        morph_h = cv2.morphologyEx(combined_thresh, cv2.MORPH_CLOSE, kernel_h)
-        kernel_v = np.ones((2, 1), np.uint8)  # Smaller vertical kernel
-        final_thresh = cv2.morphologyEx(morph_h, cv2.MORPH_OPEN, kernel_v)
+        morph_h = cv2.morphologyEx(combined_thresh, cv2.MORPH_CLOSE, self._k_h)  # Smaller horizontal kernel
+        final_thresh = cv2.morphologyEx(morph_h, cv2.MORPH_OPEN, self._k_v)  # Smaller vertical kernel
         
         # 7. OPTIMIZED: Edge enhancement with better parameters
+        # OPTIMIZED: No dilation afterwards - the previous 1x1 kernel left the edge map unchanged
         edges = cv2.Canny(filtered, 35, 140)  # Adjusted thresholds
-        edges = cv2.dilate(edges, np.ones((1, 1), np.uint8), iterations=1)  # Smaller dilation
         
         # 8. Combine edge information with thresholded image
         final_result = cv2.bitwise_or(final_thresh, edges)
         
         return final_result, gray
 
+    @staticmethod
+    def _combined_adaptive_threshold(gray, block_sizes, c):
+        """OR of cv2.adaptiveThreshold(GAUSSIAN_C, THRESH_BINARY_INV, C=c) over block_sizes"""
+        border = cv2.BORDER_REPLICATE | cv2.BORDER_ISOLATED
+        src = gray.astype(np.float32)
+        
+        max_mean = cv2.GaussianBlur(src, (block_sizes[0], block_sizes[0]), 0, borderType=border)
+        blurred = np.empty_like(max_mean)
+        for block_size in block_sizes[1:]:
+            cv2.GaussianBlur(src, (block_size, block_size), 0, dst=blurred, borderType=border)
+            cv2.max(max_mean, blurred, dst=max_mean)
+        
+        # Same rounding of the local mean as adaptiveThreshold, then one comparison
+        np.rint(max_mean, out=max_mean)
+        src += int(np.floor(c))
+        return cv2.compare(src, max_mean, cv2.CMP_LE)
+
     def _detect_glare(self, gray_img):
         """Improved glare detection with optimized parameters"""
-        hist = cv2.calcHist([gray_img], [0], None, [256], [0, 256])
-        
-        # OPTIMIZED: Better glare detection thresholds
-        bright_region = hist[215:].sum()  # Lower threshold from 220
+        # OPTIMIZED: Only the >= 215 tail is consulted, so count it directly instead of
+        # building a full 256-bin histogram
+        bright_region = np.count_nonzero(gray_img >= 215)  # Lower threshold from 220
         total_pixels = gray_img.size
-        std_dev = np.std(gray_img)
         
-        # OPTIMIZED: More sensitive glare detection
-        return (bright_region / total_pixels > 0.025) and (std_dev > 35)  # Lower thresholds
+        # OPTIMIZED: More sensitive glare detection (std only computed when the tail qualifies)
+        return (bright_region / total_pixels > 0.025) and (gray_img.std() > 35)  # Lower thresholds
 
     def detect_edges(self, preprocessed_img):
         """Improved edge detection with optimized parameters"""
@@ -929,12 +1364,30 @@ class CodeDetector:
         )
         
         # OPTIMIZED: Apply targeted morphological operations
-        kernel = np.ones((self.morph_kernel_size//3, self.morph_kernel_size//3), np.uint8)  # Smaller kernel
-        dilated_edges = cv2.dilate(edges, kernel, iterations=1)
-        closed_edges = cv2.morphologyEx(dilated_edges, cv2.MORPH_CLOSE, kernel)
+        # OPTIMIZED: dilate + CLOSE is dilate, dilate, erode - the two dilations are fused into
+        # one pass with the combined kernel, giving the same mask in two passes instead of three
+        dilated_edges = cv2.dilate(edges, self._k_edge_double, anchor=self._edge_double_anchor)  # Smaller kernel
+        closed_edges = cv2.erode(dilated_edges, self._k_edge)
         
         return closed_edges
     
+    # OPTIMIZED: The four edge lengths of an ordered quad in one vectorized hypot call
+    _EDGE_ENDS = np.array([1, 2, 3, 2])
+    _EDGE_STARTS = np.array([0, 3, 0, 1])
+
+    def _warp_size(self, src_pts):
+        """Width/height of the rectified crop for ordered (tl, tr, br, bl) corner points"""
+        d = src_pts[self._EDGE_ENDS] - src_pts[self._EDGE_STARTS]
+        lens = np.hypot(d[:, 0], d[:, 1])
+        return int(max(lens[0], lens[1])), int(max(lens[2], lens[3]))
+
+    # OPTIMIZED: Destination corners are a scaled unit rectangle, not a fresh literal per contour
+    _UNIT_RECT = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float32)
+
+    def _dst_points(self, width, height):
+        """Destination corners (tl, tr, br, bl) of a width x height rectified crop"""
+        return self._UNIT_RECT * np.array([width - 1, height - 1], dtype=np.float32)
+    
     def _order_points(self, pts):
         """Improved point ordering with better error handling"""
         try:
@@ -987,10 +1440,10 @@ class CodeDetector:
         h, w = gray.shape[:2]
         center = (w // 2, h // 2)
         
-        sobel_x = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        sobel_y = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        grad_x = cv2.convertScaleAbs(sobel_x)
-        grad_y = cv2.convertScaleAbs(sobel_y)
+        # OPTIMIZED: int16 derivatives - exact for 3x3 on uint8 and only used saturated to uint8
+        grad_x, grad_y = cv2.spatialGradient(gray)
+        grad_x = cv2.convertScaleAbs(grad_x)
+        grad_y = cv2.convertScaleAbs(grad_y)
         
         sum_x = np.sum(grad_x)
         sum_y = np.sum(grad_y)
@@ -1027,36 +1480,48 @@ class CodeDetector:
         
         return rotated
 
+    def _gate_contours(self, contours, check_rect_ratio=False):
+        """Yield (contour, minAreaRect) for contours passing the area / aspect ratio / fill gates
+
+        OPTIMIZED: The scalar gates are evaluated as NumPy masks over all contours at once, so
+        only the survivors enter the per-contour approximation and warp path
+        """
+        if not contours:
+            return
+        
+        areas = np.fromiter((cv2.contourArea(c) for c in contours), dtype=np.float64, count=len(contours))
+        candidates = np.flatnonzero(areas >= self.min_contour_area)
+        if candidates.size == 0:
+            return
+        
+        rects = [cv2.minAreaRect(contours[i]) for i in candidates]
+        sides = np.array([rect[1] for rect in rects], dtype=np.float64).reshape(-1, 2)
+        short_side = sides.min(axis=1)
+        long_side = sides.max(axis=1)
+        
+        aspect_ratio = np.divide(long_side, short_side, out=np.zeros_like(long_side), where=short_side > 0)
+        keep = (aspect_ratio >= self.aspect_ratio_range[0]) & (aspect_ratio <= self.aspect_ratio_range[1])
+        
+        if check_rect_ratio:
+            rect_area = sides[:, 0] * sides[:, 1]
+            area_ratio = np.divide(areas[candidates], rect_area, out=np.zeros_like(rect_area), where=rect_area > 0)
+            keep &= area_ratio >= self.min_rect_ratio
+        
+        for j in np.flatnonzero(keep):
+            yield contours[candidates[j]], rects[j]
+    
     def find_code_regions(self, edge_img, original_img):
         """Improved region detection with better boundary fitting"""
         contours, _ = cv2.findContours(edge_img, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         code_regions = []
         
-        for contour in contours:
+        # IMPROVED: Better polygon approximation with multiple epsilon values
+        # OPTIMIZED: Built once per call rather than once per contour
+        epsilon_values = (0.01, 0.015, 0.02, 0.025, 0.03)  # More granular approximation
+        
+        for contour, rect in self._gate_contours(contours, check_rect_ratio=True):
             try:
-                if cv2.contourArea(contour) < self.min_contour_area:
-                    continue
-                
-                rect = cv2.minAreaRect(contour)
-                box = cv2.boxPoints(rect)
-                box = box.astype(np.int32)
-                
-                width, height = rect[1][0], rect[1][1]
-                area = width * height
-                aspect_ratio = max(width, height) / min(width, height) if min(width, height) > 0 else 0
-                
-                if not (self.aspect_ratio_range[0] <= aspect_ratio <= self.aspect_ratio_range[1]):
-                    continue
-                
-                contour_area = cv2.contourArea(contour)
-                area_ratio = contour_area / area if area > 0 else 0
-                
-                if area_ratio < self.min_rect_ratio:
-                    continue
-                
-                # IMPROVED: Better polygon approximation with multiple epsilon values
                 peri = cv2.arcLength(contour, True)
-                epsilon_values = [0.01, 0.015, 0.02, 0.025, 0.03]  # More granular approximation
                 
                 best_approx = None
                 best_score = float('-inf')
@@ -1078,9 +1543,15 @@ class CodeDetector:
                         if score > best_score:
                             best_score = score
                             best_approx = approx
+                        
+                        # OPTIMIZED: A near-perfect quadrilateral (>= 17.6 of a possible 18) cannot
+                        # be meaningfully improved by coarser epsilons - stop searching
+                        if corner_score == 10 and rectangularity >= 0.95:
+                            break
                 
                 if best_approx is None or len(best_approx) < 3:
-                    approx = box.reshape(4, 1, 2)
+                    # OPTIMIZED: The minAreaRect corners are only needed when no approximation fits
+                    approx = cv2.boxPoints(rect).astype(np.int32).reshape(4, 1, 2)
                 else:
                     approx = best_approx
                 
@@ -1088,28 +1559,17 @@ class CodeDetector:
                 
                 if len(box) != 4:
                     rect = cv2.minAreaRect(box.reshape(-1, 1, 2))
-                    box = cv2.boxPoints(rect)
-                    box = box.astype(np.int32)
+                    box = cv2.boxPoints(rect).astype(np.int32)
                 
                 box = self._order_points(box)
                 src_pts = box.astype("float32")
                 
-                width = int(max(
-                    np.linalg.norm(src_pts[0] - src_pts[1]),
-                    np.linalg.norm(src_pts[2] - src_pts[3])
-                ))
-                height = int(max(
-                    np.linalg.norm(src_pts[0] - src_pts[3]),
-                    np.linalg.norm(src_pts[1] - src_pts[2])
-                ))
+                width, height = self._warp_size(src_pts)
                 
                 if width < 10 or height < 10:
                     continue
                     
-                dst_pts = np.array([
-                    [0, 0], [width - 1, 0],
-                    [width - 1, height - 1], [0, height - 1]
-                ], dtype="float32")
+                dst_pts = self._dst_points(width, height)
                 
                 M = cv2.getPerspectiveTransform(src_pts, dst_pts)
                 warped = cv2.warpPerspective(original_img, M, (width, height))
@@ -1122,14 +1582,16 @@ class CodeDetector:
                     _, binary = cv2.threshold(warped_gray, 200, 255, cv2.THRESH_BINARY_INV)
                     
                     # Morphological operations to connect barcode elements
-                    kernel = np.ones((2, 2), np.uint8)
-                    binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+                    binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, self._k_glare)
                     
                     # Find content boundaries
-                    coords = cv2.findNonZero(binary)
-                    
-                    if coords is not None and len(coords) > 50:  # Sufficient content
-                        x, y, w, h = cv2.boundingRect(coords)
+                    # OPTIMIZED: Count and row/column projections instead of materialising every
+                    # foreground pixel with findNonZero just to take its bounding rect
+                    if cv2.countNonZero(binary) > 50:  # Sufficient content
+                        ys = np.flatnonzero(binary.any(axis=1))
+                        xs = np.flatnonzero(binary.any(axis=0))
+                        x, y = int(xs[0]), int(ys[0])
+                        w, h = int(xs[-1]) - x + 1, int(ys[-1]) - y + 1
                         
                         # OPTIMIZED: Better padding calculation
                         padding_x = max(3, int(w * 0.05))  # 5% padding or minimum 3 pixels
@@ -1190,12 +1652,15 @@ class CodeDetector:
     
     def detect_gradient_regions(self, gray_img, original_img):
         """Improved gradient detection with optimized parameters"""
-        # OPTIMIZED: Better gradient calculation
-        grad_x = cv2.Sobel(gray_img, cv2.CV_64F, 1, 0, ksize=3)
-        grad_y = cv2.Sobel(gray_img, cv2.CV_64F, 0, 1, ksize=3)
+        # OPTIMIZED: Both 3x3 Sobel derivatives in one int16 spatialGradient pass with the L1 magnitude
+        # |gx| + |gy| (no per-pixel sqrt, at most 2040 so it fits int16); min-max normalization
+        # keeps the thresholds below valid
+        grad_x, grad_y = cv2.spatialGradient(gray_img)
         
-        grad_mag = cv2.magnitude(grad_x, grad_y)
-        grad_mag = cv2.normalize(grad_mag, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+        np.abs(grad_x, out=grad_x)
+        np.abs(grad_y, out=grad_y)
+        grad_mag = cv2.add(grad_x, grad_y, dst=grad_x)
+        grad_mag = cv2.normalize(grad_mag, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
         
         # OPTIMIZED: Better adaptive thresholding parameters
         grad_mag_enhanced = cv2.adaptiveThreshold(
@@ -1208,48 +1673,25 @@ class CodeDetector:
         combined_grad = cv2.bitwise_or(grad_mag_enhanced, binary_grad)
         
         # OPTIMIZED: Smaller morphological kernels
-        kernel_h = np.ones((1, 3), np.uint8)  # Reduced from (1, 5)
-        morph_h = cv2.morphologyEx(combined_grad, cv2.MORPH_CLOSE, kernel_h)
-        kernel_v = np.ones((3, 1), np.uint8)  # Reduced from (5, 1)
-        morph_grad = cv2.morphologyEx(morph_h, cv2.MORPH_CLOSE, kernel_v)
+        morph_h = cv2.morphologyEx(combined_grad, cv2.MORPH_CLOSE, self._k_grad_h)  # Reduced from (1, 5)
+        morph_grad = cv2.morphologyEx(morph_h, cv2.MORPH_CLOSE, self._k_grad_v)  # Reduced from (5, 1)
         
         contours, _ = cv2.findContours(morph_grad, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         gradient_regions = []
         
-        for contour in contours:
+        for contour, rect in self._gate_contours(contours):
             try:
-                if cv2.contourArea(contour) < self.min_contour_area:
-                    continue
-                    
-                rect = cv2.minAreaRect(contour)
-                box = cv2.boxPoints(rect)
-                box = box.astype(np.int32)
-                
-                width, height = rect[1][0], rect[1][1]
-                aspect_ratio = max(width, height) / min(width, height) if min(width, height) > 0 else 0
-                
-                if not (self.aspect_ratio_range[0] <= aspect_ratio <= self.aspect_ratio_range[1]):
-                    continue
+                box = cv2.boxPoints(rect).astype(np.int32)
                 
                 box = self._order_points(box)
                 src_pts = box.astype("float32")
                 
-                width = int(max(
-                    np.linalg.norm(src_pts[0] - src_pts[1]),
-                    np.linalg.norm(src_pts[2] - src_pts[3])
-                ))
-                height = int(max(
-                    np.linalg.norm(src_pts[0] - src_pts[3]),
-                    np.linalg.norm(src_pts[1] - src_pts[2])
-                ))
+                width, height = self._warp_size(src_pts)
                 
                 if width < 10 or height < 10:
                     continue
                 
-                dst_pts = np.array([
-                    [0, 0], [width - 1, 0],
-                    [width - 1, height - 1], [0, height - 1]
-                ], dtype="float32")
+                dst_pts = self._dst_points(width, height)
                 
                 M = cv2.getPerspectiveTransform(src_pts, dst_pts)
                 warped = cv2.warpPerspective(original_img, M, (width, height))
@@ -1268,16 +1710,13 @@ class CodeDetector:
         
         return gradient_regions    
 
-    def detect_direct_with_pyzbar(self, original_img):
+    def detect_direct_with_pyzbar(self, original_img, gray=None):
         """Improved direct detection with better preprocessing"""
-        if len(original_img.shape) == 3:
-            gray = cv2.cvtColor(original_img, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = original_img
+        if gray is None:
+            gray = cv2.cvtColor(original_img, cv2.COLOR_BGR2GRAY) if len(original_img.shape) == 3 else original_img
         
         # OPTIMIZED: Better preprocessing for PyZBar
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-        enhanced = clahe.apply(gray)
+        enhanced = self._pyzbar_clahe.apply(gray)
         
         # OPTIMIZED: Sharper bilateral filter
         filtered = cv2.bilateralFilter(enhanced, 3, 30, 30)  # Smaller parameters
@@ -1290,8 +1729,9 @@ class CodeDetector:
         # ADDITIONAL: Try with multiple preprocessing variations
         if not decoded_objects:
             # Try with different thresholds
-            for thresh_val in [127, 100, 150]:
-                _, binary = cv2.threshold(enhanced, thresh_val, 255, cv2.THRESH_BINARY)
+            # OPTIMIZED: All thresholds in one broadcast compare instead of one cv2.threshold pass each
+            binaries = (enhanced[None, :, :] > self._direct_thresholds[:, None, None]).view(np.uint8) * np.uint8(255)
+            for binary in binaries:
                 decoded_objects = decode_silent(binary) # pyzbar.decode(binary)
                 if decoded_objects:
                     break
@@ -1322,22 +1762,9 @@ class CodeDetector:
                 box = self._order_points(box)
                 src_pts = box.astype("float32")
                 
-                width = int(max(
-                    np.linalg.norm(src_pts[0] - src_pts[1]),
-                    np.linalg.norm(src_pts[2] - src_pts[3])
-                ))
-                height = int(max(
-                    np.linalg.norm(src_pts[0] - src_pts[3]),
-                    np.linalg.norm(src_pts[1] - src_pts[2])
-                ))
+                width, height = self._warp_size(src_pts)
                 
-                dst_pts = np.array([
-                    [0, 0], [width - 1, 0],
-                    [width - 1, height - 1], [0, height - 1]
-                ], dtype="float32")
-                
-                M = cv2.getPerspectiveTransform(src_pts, dst_pts)
-                warped = cv2.warpPerspective(original_img, M, (width, height))
+                warped = self._warp_region(original_img, src_pts, width, height)
                 
                 rect = cv2.minAreaRect(box.reshape(-1, 1, 2))
                 
@@ -1357,16 +1784,31 @@ class CodeDetector:
         
         return direct_regions
 
-    def detect_qr_codes(self, image):
-        """Improved QR code detection with optimized parameters"""
+    def detect_qr_codes(self, image, gray=None, expect_more=True):
+        """Improved QR code detection with optimized parameters
+
+        OPTIMIZED: With expect_more=False (other passes already found codes) the corner/grid
+        sweep only runs when OpenCV's QR detector locates a QR code it could not decode
+        """
         if image is None or image.size == 0:
             return []
         
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image.copy()
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image  # OPTIMIZED: read-only, no copy needed
+        
+        # OPTIMIZED: OpenCV's native multi-QR detector on the plain grayscale frame first; the
+        # enhanced grid sweep below only runs when it does not decode every code it locates
+        try:
+            found, decoded_data, bboxes, _ = self._qr_detector.detectAndDecodeMulti(gray)
+            if found and bboxes is not None and decoded_data and all(decoded_data):
+                return [self._opencv_qr_region(image, bbox, data) for data, bbox in zip(decoded_data, bboxes)]
+            if not expect_more and (not found or bboxes is None):
+                return []
+        except Exception as e:
+            print(f"Error in QR detection: {e}")
         
         # OPTIMIZED: Better CLAHE parameters for QR codes
-        clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(6, 6))  # Smaller grid
-        enhanced = clahe.apply(gray)
+        enhanced = self._qr_clahe.apply(gray)  # Smaller grid
         
         # OPTIMIZED: Better adaptive threshold for QR codes
         binary = cv2.adaptiveThreshold(
@@ -1382,7 +1824,6 @@ class CodeDetector:
         if corners is None or len(corners) < 4:
             return []
         
-        # corners = np.int0(corners).reshape(-1, 2)
         corners = corners.astype(np.int32).reshape(-1, 2)
 
         # OPTIMIZED: Better grid-based search for multiple QR codes
@@ -1390,23 +1831,40 @@ class CodeDetector:
         h, w = gray.shape[:2]
         grid_size = min(w, h) // 3  # Smaller grid for better coverage
         
-        for y in range(0, h, grid_size):
-            for x in range(0, w, grid_size):
+        # OPTIMIZED: Corner counts of every tile in one vectorized pass - tiles with fewer than
+        # 4 Shi-Tomasi corners (a QR code has 3 finder patterns plus modules) are never decoded
+        tile_ys = np.arange(0, h, grid_size)
+        tile_xs = np.arange(0, w, grid_size)
+        in_rows = (corners[:, 1][None, :] >= tile_ys[:, None]) & (corners[:, 1][None, :] < tile_ys[:, None] + grid_size * 2)
+        in_cols = (corners[:, 0][None, :] >= tile_xs[:, None]) & (corners[:, 0][None, :] < tile_xs[:, None] + grid_size * 2)
+        tile_corners = in_rows.astype(np.int32) @ in_cols.T.astype(np.int32)
+        
+        # Tiles are scanned in raster order, not by corner count: every tile is visited (a frame may
+        # hold several QR codes), so sorting would not end the scan sooner - it would only change
+        # which overlapping tile reports a code first, and with it the reported box and region order
+        for row, y in enumerate(tile_ys.tolist()):
+            for col, x in enumerate(tile_xs.tolist()):
                 roi_width = min(grid_size * 2, w - x)
                 roi_height = min(grid_size * 2, h - y)
                 
                 if roi_width <= 0 or roi_height <= 0:
                     continue
+                
+                if tile_corners[row, col] < 4:
+                    continue
                     
                 roi = binary[y:y+roi_height, x:x+roi_width]
                 roi_gray = gray[y:y+roi_height, x:x+roi_width]
                 
+                # Flat tiles (blank paper, solid background) cannot hold a code
+                if roi_gray.std() < 10:
+                    continue
+                
                 # Try multiple preprocessing variations
                 test_images = [roi, roi_gray]
                 
                 # Add sharpened version
-                kernel = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-                sharpened = cv2.filter2D(roi_gray, -1, kernel)
+                sharpened = cv2.filter2D(roi_gray, -1, _SHARPEN_KERNEL)
                 test_images.append(sharpened)
                 
                 for test_img in test_images:
@@ -1429,22 +1887,9 @@ class CodeDetector:
                                 points = self._order_points(points)
                                 
                                 src_pts = points.astype("float32")
-                                width = int(max(
-                                    np.linalg.norm(src_pts[0] - src_pts[1]),
-                                    np.linalg.norm(src_pts[2] - src_pts[3])
-                                ))
-                                height = int(max(
-                                    np.linalg.norm(src_pts[0] - src_pts[3]),
-                                    np.linalg.norm(src_pts[1] - src_pts[2])
-                                ))
-                                
-                                dst_pts = np.array([
-                                    [0, 0], [width - 1, 0],
-                                    [width - 1, height - 1], [0, height - 1]
-                                ], dtype="float32")
+                                width, height = self._warp_size(src_pts)
                                 
-                                M = cv2.getPerspectiveTransform(src_pts, dst_pts)
-                                warped = cv2.warpPerspective(image, M, (width, height))
+                                warped = self._warp_region(image, src_pts, width, height)
                                 
                                 rect = cv2.minAreaRect(points.reshape(-1, 1, 2))
                                 
@@ -1461,110 +1906,168 @@ class CodeDetector:
                         break  # Exit preprocessing loop if found
         
         # If no QR codes found with grid approach, try OpenCV QRCodeDetector
+        # OPTIMIZED: One multi-QR pass on the enhanced image (the plain grayscale frame was tried
+        # above), then one on the inverted binary for light-on-dark codes
         if not qr_regions:
-            qr_detector = cv2.QRCodeDetector()
-            
-            # OPTIMIZED: Try multiple preprocessed versions
-            versions = [
-                gray,
-                enhanced,
-                binary,
-                cv2.GaussianBlur(enhanced, (3, 3), 0),  # Smaller blur
-                cv2.bitwise_not(binary)
-            ]
-            
-            for img_version in versions:
+            for img_version in (enhanced, cv2.bitwise_not(binary)):
                 try:
-                    data, bbox, straight_qrcode = qr_detector.detectAndDecode(img_version)
+                    found, decoded_data, bboxes, _ = self._qr_detector.detectAndDecodeMulti(img_version)
                     
-                    if data and bbox is not None:
-                        points = bbox.astype(np.int32).reshape(-1, 2)
-                        
-                        if len(points) != 4:
-                            rect = cv2.minAreaRect(points.reshape(-1, 1, 2))
-                            points = cv2.boxPoints(rect).astype(np.int32)
-                        
-                        points = self._order_points(points)
-                        
-                        src_pts = points.astype("float32")
-                        width = int(max(
-                            np.linalg.norm(src_pts[0] - src_pts[1]),
-                            np.linalg.norm(src_pts[2] - src_pts[3])
-                        ))
-                        height = int(max(
-                            np.linalg.norm(src_pts[0] - src_pts[3]),
-                            np.linalg.norm(src_pts[1] - src_pts[2])
-                        ))
-                        
-                        dst_pts = np.array([
-                            [0, 0], [width - 1, 0],
-                            [width - 1, height - 1], [0, height - 1]
-                        ], dtype="float32")
-                        
-                        M = cv2.getPerspectiveTransform(src_pts, dst_pts)
-                        warped = cv2.warpPerspective(image, M, (width, height))
-                        
-                        rect = cv2.minAreaRect(points.reshape(-1, 1, 2))
-                        
-                        qr_regions.append({
-                            'box': points,
-                            'warped': warped,
-                            'rect': rect,
-                            'decoded': {
-                                'type': 'QRCODE',
-                                'data': data,
-                                'polygon': None
-                            }
-                        })
+                    if found and bboxes is not None:
+                        qr_regions.extend(self._opencv_qr_region(image, bbox, data)
+                                          for data, bbox in zip(decoded_data, bboxes) if data)
                 except Exception as e:
                     print(f"Error in QR detection: {e}")
                     continue
+                
+                if qr_regions:
+                    break
                     
         return qr_regions
 
+    def _opencv_qr_region(self, image, bbox, data):
+        """Region dict for a QR code located and decoded by cv2.QRCodeDetector"""
+        points = bbox.astype(np.int32).reshape(-1, 2)
+        
+        if len(points) != 4:
+            rect = cv2.minAreaRect(points.reshape(-1, 1, 2))
+            points = cv2.boxPoints(rect).astype(np.int32)
+        
+        points = self._order_points(points)
+        
+        src_pts = points.astype("float32")
+        width, height = self._warp_size(src_pts)
+        
+        warped = self._warp_region(image, src_pts, width, height)
+        
+        rect = cv2.minAreaRect(points.reshape(-1, 1, 2))
+        
+        return {
+            'box': points,
+            'warped': warped,
+            'rect': rect,
+            'decoded': {
+                'type': 'QRCODE',
+                'data': data,
+                'polygon': None
+            }
+        }
+    
     def detect(self, image):
         """Main detection pipeline with original logic"""
-        # First try direct detection with PyZBar (fast path for clean codes)
-        direct_regions = self.detect_direct_with_pyzbar(image)
+        # OPTIMIZED: Convert to grayscale once into the reused frame buffer; the PyZBar, QR and
+        # preprocessing passes all read it
+        gray = self._to_gray(image)
         
-        # Special QR code detection for multiple QR codes
-        qr_regions = self.detect_qr_codes(image)
+        # OPTIMIZED: On large frames the PyZBar and QR passes run on a copy of about
+        # max_fast_pass_pixels; found regions are mapped back and re-cropped at full resolution
+        h, w = gray.shape[:2]
+        scale = min(1.0, np.sqrt(self.max_fast_pass_pixels / (h * w)))
+        if scale < 1.0:
+            small = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            small_gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+            direct_regions = [self._rescale_region(r, image, 1.0 / scale)
+                              for r in self.detect_direct_with_pyzbar(small, small_gray)]
+            qr_regions = [self._rescale_region(r, image, 1.0 / scale)
+                          for r in self.detect_qr_codes(small, small_gray, expect_more=not direct_regions)]
+        else:
+            # First try direct detection with PyZBar (fast path for clean codes)
+            direct_regions = self.detect_direct_with_pyzbar(image, gray)
+            
+            # Special QR code detection for multiple QR codes
+            qr_regions = self.detect_qr_codes(image, gray, expect_more=not direct_regions)
         
         # If direct detection found codes, add them to our results
         all_regions = direct_regions.copy()
         all_regions.extend(qr_regions)
         
-        # Convert to grayscale for further processing
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image.copy()
-        
         # Assess image quality for adaptive processing
         blur_level = cv2.Laplacian(gray, cv2.CV_64F).var()
         has_glare = self._detect_glare(gray)
         
         # For challenging images or if direct detection missed codes, use traditional methods
         if len(all_regions) == 0 or blur_level < self.clean_image_threshold or has_glare:
-            # Preprocess the image with enhanced algorithms
-            preprocessed_img, gray_img = self.preprocess_image(image)
+            # Preprocess the image with enhanced algorithms (same grayscale and quality measures)
+            preprocessed_img, gray_img = self.preprocess_image(image, gray, blur_level, has_glare)
+            
+            # OPTIMIZED: The gradient pass is independent of the edge pass - run it on a worker
+            # thread while this thread does edge detection and region fitting
+            gradient_future = _detect_pool().submit(self.detect_gradient_regions, gray_img, image)
             
             # Apply edge detection with optimized parameters
             edge_img = self.detect_edges(preprocessed_img)
             
             # Find code regions using different methods
             edge_regions = self.find_code_regions(edge_img, image)
-            gradient_regions = self.detect_gradient_regions(gray_img, image)
+            gradient_regions = gradient_future.result()
             
             # Add regions to our collection
             all_regions.extend(edge_regions)
             all_regions.extend(gradient_regions)
         
+        # The frame is done - release it, its downscaled copy and their cached crops
+        self._warp_caches = {}
+        
         # Remove duplicates with improved overlap detection
         unique_regions = self._remove_duplicates(all_regions)
         
         # Filter out false positives
         filtered_regions = self._filter_false_positives(unique_regions, image)
         
+        # OPTIMIZED: Drawing-ready int32 contour of each box, built once here for all consumers
+        for region in filtered_regions:
+            region['pts'] = np.asarray(region['box'], dtype=np.int32).reshape(-1, 1, 2)
+        
         return filtered_regions
     
+    def _rescale_region(self, region, image, factor):
+        """Map a region found on a resized copy back onto image (box, rect and full-resolution crop)"""
+        box = self._order_points(np.asarray(region['box'], dtype=np.float32) * factor)
+        width, height = self._warp_size(box)
+        return dict(
+            region,
+            box=box,
+            rect=cv2.minAreaRect(box.reshape(-1, 1, 2)),
+            warped=self._warp_region(image, box, width, height)
+        )
+    
+    def _warp_region(self, image, src_pts, width, height):
+        """Perspective-rectify the quad src_pts of image to a width x height crop (a view of image
+        when the quad is an axis-aligned rectangle inside it)
+
+        OPTIMIZED: The overlapping QR grid tiles and the direct PyZBar pass often report the
+        same code with identical corners; each distinct quad of a frame is warped only once.
+        """
+        # Keyed by the source image's id; the entry keeps the image alive so the id cannot be reused
+        _, warp_cache = self._warp_caches.setdefault(id(image), (image, {}))
+        
+        key = (src_pts.tobytes(), width, height)
+        warped = warp_cache.get(key)
+        if warped is None:
+            # OPTIMIZED: Upright, axis-aligned quads (typical for PyZBar polygons) are a plain crop
+            (tl_x, tl_y), (tr_x, tr_y), (br_x, br_y), (bl_x, bl_y) = src_pts.tolist()
+            if abs(tl_y - tr_y) <= 1 and abs(bl_y - br_y) <= 1 and abs(tl_x - bl_x) <= 1 and abs(tr_x - br_x) <= 1:
+                x, y = int(round(min(tl_x, bl_x))), int(round(min(tl_y, tr_y)))
+                if x >= 0 and y >= 0 and x + width <= image.shape[1] and y + height <= image.shape[0]:
+                    warped = warp_cache[key] = image[y:y + height, x:x + width]
+                    return warped
+            
+            M = cv2.getPerspectiveTransform(src_pts, self._dst_points(width, height))
+            warped = warp_cache[key] = cv2.warpPerspective(image, M, (width, height))
+        return warped
+    
+    def _to_gray(self, image):
+        """Grayscale view of a frame, converted into a buffer reused across detect() calls
+
+        The buffer is overwritten by the next frame - copy it to keep a snapshot.
+        """
+        if image.ndim == 2:
+            return image
+        h, w = image.shape[:2]
+        if self._gray_buf is None or self._gray_buf.shape != (h, w):
+            self._gray_buf = np.empty((h, w), dtype=np.uint8)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
+    
     def _remove_duplicates(self, regions):
         """Improved duplicate removal with optimized thresholds"""
         if len(regions) <= 1:
@@ -1575,62 +2078,56 @@ class CodeDetector:
         
         if other_regions:
             try:
-                other_regions = sorted(other_regions, key=lambda r: cv2.contourArea(np.array([r['box']], dtype=np.int32)), reverse=True)
+                # OPTIMIZED: Shoelace areas of all boxes in one pass (same as contourArea), largest first;
+                # the stable sort keeps the original order of equal areas like sorted() does
+                boxes = np.stack([np.asarray(r['box'], dtype=np.int32).reshape(-1, 2) for r in other_regions]).astype(np.int64)
+                x, y = boxes[:, :, 0], boxes[:, :, 1]
+                areas = np.abs(np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1))
+                other_regions = [other_regions[i] for i in np.argsort(-areas, kind='stable').tolist()]
             except Exception:
                 other_regions = sorted(other_regions, key=lambda r: r['rect'][1][0] * r['rect'][1][1], reverse=True)
         
         sorted_regions = decoded_regions + other_regions
         
+        # OPTIMIZED: Pairwise bounding-rect IoU and centre distances for all regions at once;
+        # a region is dropped when an earlier kept region overlaps it or sits too close to it
+        overlaps = self._duplicate_matrix([r['box'] for r in sorted_regions])
+        
         unique = []
-        used = set()
+        used = np.zeros(len(sorted_regions), dtype=bool)
         
         for i, r1 in enumerate(sorted_regions):
-            if i in used:
+            if used[i]:
                 continue
-                
-            unique.append(r1)
             
-            for j, r2 in enumerate(sorted_regions):
-                if i != j and j not in used:
-                    iou = self._calculate_iou(r1['box'], r2['box'])
-                    if iou > self.iou_threshold:
-                        used.add(j)
-                    else:
-                        min_dist = self._min_distance_between_boxes(r1['box'], r2['box'])
-                        if min_dist < self.min_distance_between_codes:
-                            used.add(j)
+            unique.append(r1)
+            used |= overlaps[i]
         
         return unique
-        
-    def _calculate_iou(self, box1, box2):
-        """Calculate intersection over union for two bounding boxes"""
-        try:
-            box1_pts = np.array([box1], dtype=np.int32)
-            box2_pts = np.array([box2], dtype=np.int32)
-            
-            x1, y1, w1, h1 = cv2.boundingRect(box1_pts)
-            x2, y2, w2, h2 = cv2.boundingRect(box2_pts)
-            
-            x_intersection = max(0, min(x1 + w1, x2 + w2) - max(x1, x2))
-            y_intersection = max(0, min(y1 + h1, y2 + h2) - max(y1, y2))
-            intersection = x_intersection * y_intersection
-            
-            union = w1 * h1 + w2 * h2 - intersection
-            
-            return intersection / union if union > 0 else 0
-        except Exception as e:
-            print(f"Error calculating IoU: {e}")
-            return 0
-            
-    def _min_distance_between_boxes(self, box1, box2):
-        """Calculate minimum distance between two boxes"""
-        try:
-            center1 = np.mean(box1, axis=0)
-            center2 = np.mean(box2, axis=0)
-            return np.linalg.norm(center1 - center2)
-        except Exception as e:
-            print(f"Error calculating distance: {e}")
-            return float('inf')
+    
+    def _duplicate_matrix(self, boxes):
+        """(N, N) bool matrix: IoU above iou_threshold or centres closer than min_distance_between_codes"""
+        boxes = [np.asarray(box).reshape(-1, 2) for box in boxes]
+        
+        # Integer bounding rects with cv2.boundingRect semantics (inclusive extents)
+        int_boxes = [box.astype(np.int32) for box in boxes]
+        x = np.array([b[:, 0].min() for b in int_boxes], dtype=np.int64)
+        y = np.array([b[:, 1].min() for b in int_boxes], dtype=np.int64)
+        w = np.array([b[:, 0].max() for b in int_boxes], dtype=np.int64) - x + 1
+        h = np.array([b[:, 1].max() for b in int_boxes], dtype=np.int64) - y + 1
+        
+        x_intersection = np.maximum(0, np.minimum((x + w)[:, None], (x + w)[None, :]) - np.maximum(x[:, None], x[None, :]))
+        y_intersection = np.maximum(0, np.minimum((y + h)[:, None], (y + h)[None, :]) - np.maximum(y[:, None], y[None, :]))
+        intersection = x_intersection * y_intersection
+        union = (w * h)[:, None] + (w * h)[None, :] - intersection
+        iou = np.divide(intersection, union, out=np.zeros(union.shape), where=union > 0)
+        
+        centers = np.array([box.mean(axis=0) for box in boxes], dtype=np.float64)
+        distances = np.hypot(centers[:, None, 0] - centers[None, :, 0], centers[:, None, 1] - centers[None, :, 1])
+        
+        duplicates = (iou > self.iou_threshold) | (distances < self.min_distance_between_codes)
+        np.fill_diagonal(duplicates, False)
+        return duplicates
         
     def _filter_false_positives(self, regions, original_img):
         """Filter out false positive detections"""
@@ -1640,27 +2137,37 @@ class CodeDetector:
         decoded_regions = [r for r in regions if 'decoded' in r]
         if decoded_regions:
             return decoded_regions
+        
+        # OPTIMIZED: A handful of undecoded candidates is left to the recognizer; the pattern
+        # analysis below only pays off on larger candidate sets
+        if len(regions) < self.min_regions_for_fp_filter:
+            return regions
             
         filtered = []
         img_height, img_width = original_img.shape[:2]
         img_area = img_width * img_height
         
-        for region in regions:
-            box = region['box']
-            region_area = cv2.contourArea(box.reshape(-1, 1, 2))
-            
-            # OPTIMIZED: Better area filtering
-            if region_area < 0.0005 * img_area or region_area > 0.95 * img_area:  # More restrictive
+        # OPTIMIZED: Better area filtering, for all boxes in one shoelace pass (same as contourArea)
+        boxes = np.array([np.asarray(r['box'], dtype=np.float64).reshape(4, 2) for r in regions])
+        x, y = boxes[:, :, 0], boxes[:, :, 1]
+        areas = 0.5 * np.abs(np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1))
+        area_ok = (areas >= 0.0005 * img_area) & (areas <= 0.95 * img_area)  # More restrictive
+        
+        for region, keep in zip(regions, area_ok.tolist()):
+            if not keep:
                 continue
                 
             warped = region['warped']
             if warped.size == 0:
                 continue
                 
+            # OPTIMIZED: Keep the grayscale crop on the region - the recognizer reuses it
             warped_gray = cv2.cvtColor(warped, cv2.COLOR_BGR2GRAY) if len(warped.shape) == 3 else warped
+            region['warped_gray'] = warped_gray
             
             # OPTIMIZED: Better barcode pattern detection
-            sobel_x = cv2.Sobel(warped_gray, cv2.CV_64F, 1, 0, ksize=3)
+            # OPTIMIZED: int16 derivative (exact for 3x3 on uint8) instead of a float64 buffer
+            sobel_x = cv2.Sobel(warped_gray, cv2.CV_16S, 1, 0, ksize=3)
             abs_sobel_x = cv2.convertScaleAbs(sobel_x)
             
             _, edge_binary = cv2.threshold(abs_sobel_x, 35, 255, cv2.THRESH_BINARY)  # Lower threshold
@@ -1705,150 +2212,190 @@ class CodeRecognizer:
         # OPTIMIZED: Better EAN-13 parameters
         self.use_ean13_enhancement = True
         self.ean13_adaptive_thresholds = [80, 120, 160, 200]  # More thresholds
-    
-    def decode(self, image):
-        """Enhanced decode method with optimized preprocessing"""
-        if image is None or image.size == 0:
-            return None
-            
-        if len(image.shape) == 3:
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = image.copy()
         
-        # OPTIMIZED: Better gradient analysis for rotation detection
-        sobel_x = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
-        sobel_y = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
-        abs_sobel_x = cv2.convertScaleAbs(sobel_x)
-        abs_sobel_y = cv2.convertScaleAbs(sobel_y)
+        # OPTIMIZED: One CLAHE instance for every orientation of every crop - per thread, since
+        # regions of one image may be decoded concurrently and CLAHE objects keep scratch buffers
+        self._local = threading.local()
         
-        sum_x = np.sum(abs_sobel_x)
-        sum_y = np.sum(abs_sobel_y)
-        
-        rotated_images = []
-        h, w = gray.shape[:2]
-        
-        rotated_images.append(image)
-        
-        # OPTIMIZED: More selective rotation attempts
-        if sum_y > sum_x * 1.5:  # Increased threshold
-            center = (w // 2, h // 2)
-            for angle in [90, -90]:
-                M = cv2.getRotationMatrix2D(center, angle, 1.0)
-                rotated = cv2.warpAffine(image, M, (w, h), borderMode=cv2.BORDER_CONSTANT, borderValue=255)
-                rotated_images.append(rotated)
-        
-        # OPTIMIZED: Reduced number of rotation angles
-        angles = [30, 45, -30, -45]   
-        for angle in angles:
-            center = (w // 2, h // 2)
-            M = cv2.getRotationMatrix2D(center, angle, 1.0)
-            
-            cos = np.abs(M[0, 0])
-            sin = np.abs(M[0, 1])
-            new_w = int((h * sin) + (w * cos))
-            new_h = int((h * cos) + (w * sin))
-            
-            M[0, 2] += (new_w / 2) - center[0]
-            M[1, 2] += (new_h / 2) - center[1]
-            
-            rotated = cv2.warpAffine(
-                image, M, (new_w, new_h),
-                borderMode=cv2.BORDER_CONSTANT,
-                borderValue=(255, 255, 255) if len(image.shape) == 3 else 255
-            )
-            rotated_images.append(rotated)
+        # NEW: Versions decoded ahead of the one being checked (1 = fully serial)
+        self.decode_window = max(1, min(4, (os.cpu_count() or 1) // 2))
     
-        # OPTIMIZED: Create enhanced versions for each orientation
-        all_versions = []
-        for rot_img in rotated_images:
-            if len(rot_img.shape) == 3:
-                rot_gray = cv2.cvtColor(rot_img, cv2.COLOR_BGR2GRAY)
-            else:
-                rot_gray = rot_img
-                
-            # OPTIMIZED: Better CLAHE parameters
-            clahe = cv2.createCLAHE(clipLimit=2.5, tileGridSize=(6, 6))  # Adjusted parameters
-            enhanced = clahe.apply(rot_gray)
-            
-            # OPTIMIZED: Better adaptive thresholding
-            binary_adaptive = cv2.adaptiveThreshold(
-                enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY_INV, 9, 2  # Smaller block size
-            )
-            
-            # Multiple thresholds
-            _, binary_otsu = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            _, binary_inv_otsu = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-            
-            all_versions.extend([
-                rot_img, rot_gray, enhanced, binary_adaptive, binary_otsu, binary_inv_otsu
-            ])
-        
-        # OPTIMIZED: Better sharpening kernel
-        kernel = np.array([[0,-1,0], [-1,5,-1], [0,-1,0]])  # Different sharpening kernel
-        sharpened = cv2.filter2D(gray, -1, kernel)
-        all_versions.append(sharpened)
-        
-        # Edge enhancement
-        sobel_combined = cv2.addWeighted(abs_sobel_x, 0.5, abs_sobel_y, 0.5, 0)
-        all_versions.append(sobel_combined)
-        
-        # OPTIMIZED: Fewer threshold values
-        for thresh in [80, 120, 160]:  # Reduced from range(50, 201, 50)
-            _, binary = cv2.threshold(gray, thresh, 255, cv2.THRESH_BINARY)
-            _, binary_inv = cv2.threshold(gray, thresh, 255, cv2.THRESH_BINARY_INV)
-            all_versions.extend([binary, binary_inv])
-        
-        # Add versions with border
-        for i, v in enumerate(all_versions[:10]):  # Only first 10 to reduce processing
-            bordered = cv2.copyMakeBorder(v, 8, 8, 8, 8, cv2.BORDER_CONSTANT, value=255)  # Smaller border
-            all_versions.append(bordered)
+    @property
+    def _clahe(self):
+        clahe = getattr(self._local, 'clahe', None)
+        if clahe is None:
+            clahe = self._local.clahe = cv2.createCLAHE(clipLimit=2.5, tileGridSize=(6, 6))  # Adjusted parameters
+        return clahe
+    
+    def decode(self, image, gray=None):
+        """Enhanced decode method with optimized preprocessing
+
+        OPTIMIZED: Callers that already hold the grayscale crop pass it as gray
+        """
+        if image is None or image.size == 0:
+            return None
         
-        # Try decoding each version
-        decoded_results = []
-        for v in all_versions:
+        # OPTIMIZED: Crops can be views into the frame; make them contiguous once here rather than
+        # letting every ZBar call copy the strided buffer
+        if not image.flags['C_CONTIGUOUS']:
+            image = np.ascontiguousarray(image)
+        if gray is not None and not gray.flags['C_CONTIGUOUS']:
+            gray = np.ascontiguousarray(gray)
+            
+        if gray is None:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if len(image.shape) == 3 else image  # OPTIMIZED: read-only, no copy needed
+        
+        # OPTIMIZED: Versions are generated lazily in the original try order and decoding stops at
+        # the first valid result - later versions are never built or decoded
+        # OPTIMIZED: Up to decode_window versions are decoded in parallel on the shared ZBar pool
+        # (the ctypes calls release the GIL); results are still checked in try order, so the
+        # returned code is the same one a serial pass would find
+        first_versions = []
+        pool = _decode_pool()
+        pending = deque()
+        with silenced_stderr_fd():
             try:
-                with SuppressStderr():
-                    decoded = decode_silent(v) #pyzbar.decode(v)
-                    if decoded:
-                        for d in decoded:
-                            decoded_data = d.data.decode('utf-8')
-                            if d.type == 'EAN13':
-                                if len(decoded_data) == 13 and self._validate_ean13_checksum(decoded_data):
-                                    decoded_results.append({
-                                        'type': d.type,
-                                        'data': decoded_data,
-                                        'polygon': d.polygon
-                                    })
-                            else:
-                                decoded_results.append({
-                                    'type': d.type,
-                                    'data': decoded_data,
-                                    'polygon': d.polygon
-                                })
-            except Exception:
-                continue
-        
-        if decoded_results:
-            return decoded_results[0]
+                for version in self._iter_versions(image, gray, first_versions):
+                    pending.append(pool.submit(decode_silent, version))
+                    if len(pending) < self.decode_window:
+                        continue
+                    result = self._first_valid_result(pending.popleft().result())
+                    if result:
+                        return result
+                while pending:
+                    result = self._first_valid_result(pending.popleft().result())
+                    if result:
+                        return result
+            finally:
+                # Queued decodes are dropped; ones already running cannot be cancelled, so wait for
+                # them while ZBar's stderr is still redirected and before the next region uses the pool
+                for future in pending:
+                    future.cancel()
+                wait(pending)
         
         # Fallback to OpenCV QR code detector
         try:
             qr = cv2.QRCodeDetector()
-            for v in all_versions[:10]:  # Only try first 10 versions
+            for v in first_versions:  # Only try first 10 versions
                 data, bbox, _ = qr.detectAndDecode(v)
                 if data:
                     return {
                         'type': 'QRCODE',
                         'data': data,
-                        'polygon': bbox.reshape(-1, 2).tolist() if bbox is not None else None
+                        'polygon': bbox.reshape(-1, 2).astype(np.int32) if bbox is not None else None
                     }
         except Exception:
             pass
         
         return None
 
+    def _iter_versions(self, image, gray, first_versions):
+        """Yield the preprocessed versions of a crop to try, one at a time
+
+        The first 10 versions are also collected in first_versions (bordered copies
+        and the OpenCV QR fallback reuse them).
+        """
+        def base_versions():
+            h, w = gray.shape[:2]
+            center = (w // 2, h // 2)
+            sobels = []
+            
+            def orientations():
+                yield image
+                
+                # OPTIMIZED: Better gradient analysis for rotation detection
+                # (only computed once the upright versions have failed)
+                # OPTIMIZED: Both 3x3 Sobel derivatives in one int16 spatialGradient pass (same values
+                # as the float64 Sobel pair once saturated to uint8)
+                grad_x, grad_y = cv2.spatialGradient(gray)
+                abs_sobel_x = cv2.convertScaleAbs(grad_x)
+                abs_sobel_y = cv2.convertScaleAbs(grad_y)
+                sobels.extend((abs_sobel_x, abs_sobel_y))
+                
+                # OPTIMIZED: More selective rotation attempts
+                if np.sum(abs_sobel_y) > np.sum(abs_sobel_x) * 1.5:  # Increased threshold
+                    # OPTIMIZED: Quarter turns are exact transposes - cv2.rotate instead of a bilinear
+                    # warpAffine, and a non-square crop keeps its full extent instead of being clipped
+                    yield cv2.rotate(image, cv2.ROTATE_90_COUNTERCLOCKWISE)  # +90
+                    yield cv2.rotate(image, cv2.ROTATE_90_CLOCKWISE)  # -90
+                
+                # The oblique angles are only reached when every version above failed to decode
+                
+                # OPTIMIZED: Reduced number of rotation angles
+                for angle in [30, 45, -30, -45]:
+                    M = cv2.getRotationMatrix2D(center, angle, 1.0)
+                    
+                    cos = np.abs(M[0, 0])
+                    sin = np.abs(M[0, 1])
+                    new_w = int((h * sin) + (w * cos))
+                    new_h = int((h * cos) + (w * sin))
+                    
+                    M[0, 2] += (new_w / 2) - center[0]
+                    M[1, 2] += (new_h / 2) - center[1]
+                    
+                    yield cv2.warpAffine(
+                        image, M, (new_w, new_h),
+                        borderMode=cv2.BORDER_CONSTANT,
+                        borderValue=(255, 255, 255) if len(image.shape) == 3 else 255
+                    )
+            
+            # OPTIMIZED: Create enhanced versions for each orientation
+            for rot_img in orientations():
+                yield rot_img
+                rot_gray = cv2.cvtColor(rot_img, cv2.COLOR_BGR2GRAY) if len(rot_img.shape) == 3 else rot_img
+                yield rot_gray
+                
+                # OPTIMIZED: Better CLAHE parameters
+                enhanced = self._clahe.apply(rot_gray)
+                yield enhanced
+                
+                # OPTIMIZED: Better adaptive thresholding
+                yield cv2.adaptiveThreshold(
+                    enhanced, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                    cv2.THRESH_BINARY_INV, 9, 2  # Smaller block size
+                )
+                
+                # Multiple thresholds
+                yield cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)[1]
+                yield cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+            
+            # OPTIMIZED: Better sharpening kernel
+            yield cv2.filter2D(gray, -1, _SHARPEN_CROSS_KERNEL)  # Different sharpening kernel
+            
+            # Edge enhancement
+            yield cv2.addWeighted(sobels[0], 0.5, sobels[1], 0.5, 0)
+            
+            # OPTIMIZED: Fewer threshold values
+            for thresh in [80, 120, 160]:  # Reduced from range(50, 201, 50)
+                binary = cv2.threshold(gray, thresh, 255, cv2.THRESH_BINARY)[1]
+                yield binary
+                yield cv2.bitwise_not(binary)  # Same as THRESH_BINARY_INV
+        
+        for version in base_versions():
+            if len(first_versions) < 10:
+                first_versions.append(version)
+            yield version
+        
+        # Add versions with border
+        for v in list(first_versions):  # Only first 10 to reduce processing
+            yield cv2.copyMakeBorder(v, 8, 8, 8, 8, cv2.BORDER_CONSTANT, value=255)  # Smaller border
+
+    def _first_valid_result(self, decoded):
+        """First usable pyzbar result of one version (EAN-13 results must pass the checksum)"""
+        try:
+            for d in decoded or ():
+                decoded_data = d.data.decode('utf-8')
+                if d.type == 'EAN13' and not (len(decoded_data) == 13 and self._validate_ean13_checksum(decoded_data)):
+                    continue
+                return {
+                    'type': d.type,
+                    'data': decoded_data,
+                    'polygon': d.polygon
+                }
+        except Exception:
+            pass
+        return None
+
     def _validate_ean13_checksum(self, ean13_str):
         """Validate EAN-13 barcode using check digit"""
         if not ean13_str.isdigit() or len(ean13_str) != 13:
@@ -1860,330 +2407,320 @@ class CodeRecognizer:
         return weighted_sum % 10 == 0
 
 
-class CodeSystemProcessor:
-    def __init__(self):
-        self.detector = CodeDetector()
-        self.recognizer = CodeRecognizer()
-        self.results = []
-        self.evaluator = PerformanceEvaluator()  # Add evaluator
-        
-        # Display options
-        self.font_scale_factor = 1.0
-        self.border_thickness = 3
-        self.text_background_opacity = 0.7
-        self.text_color = (0, 0, 255)
-        self.debug_mode = False
+# Per-process processor of the --workers pool (set up by _init_worker)
+_WORKER_PROCESSOR = None
 
-    def add_detected_code_to_log(self, folder_name, image_name, detected_code, code_type, location):
-        """Add a detected code entry to the global log with type and location"""
-        global DETECTED_CODES_LOG
-        DETECTED_CODES_LOG.append([folder_name, image_name, detected_code, code_type, location])
 
-    def process_image(self, image_path):
-        """Process a single image with FIXED fill mode and better boundaries"""
-        global FILL_MODE
-        start_time = time.time()
-        
-        try:
-            image = cv2.imread(str(image_path))
-            if image is None:
-                print(f"Error loading image: {image_path}")
-                return None
-                
-            result_img = image.copy()
-            
-            # Standard detection
-            detected_regions = self.detector.detect(image)
-            
-            recognized_codes = []
+def _init_worker(fill_mode, log_level, max_codes=None):
+    """Set up a --workers process: fill mode, direct console logging and one processor for all its images"""
+    global FILL_MODE, _WORKER_PROCESSOR
+    FILL_MODE = fill_mode
+    logger.handlers.clear()
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(console_handler)
+    logger.setLevel(log_level)
+    logger.propagate = False
+    _WORKER_PROCESSOR = CodeSystemProcessor()
+    _WORKER_PROCESSOR.max_codes = max_codes
 
-            # NEW: Get folder name for logging
-            folder_name = Path(image_path).parent.name
-            image_name = Path(image_path).name
 
-            for i, region in enumerate(detected_regions):
-                try:
-                    warped = region['warped']
-                    box = region['box']
-                    
-                    # Check if the region already has decoded data from direct detection
-                    if 'decoded' in region:
-                        decoded = region['decoded']
-                    else:
-                        decoded = self.recognizer.decode(warped)
-                        
-                    if decoded:
-                        recognized_codes.append(decoded)
-                        
-                        # NEW: Calculate bounding box for location info
-                        x_coords = [point[0] for point in box]
-                        y_coords = [point[1] for point in box]
-                        min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                        min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                        width = max_x - min_x
-                        height = max_y - min_y
-                        location_info = f"({min_x},{min_y},{width},{height})"
-                        
-                        # NEW: Add detected code to log with type and location
-                        self.add_detected_code_to_log(folder_name, image_name, decoded['data'], decoded['type'], location_info)
-                        
-                        pts = np.array(box, dtype=np.int32).reshape((-1, 1, 2))
-                        
-                        # Generate a distinct color for each code
-                        color_hue = (i * 30) % 180
-                        color = cv2.cvtColor(np.uint8([[[color_hue, 255, 255]]]), cv2.COLOR_HSV2BGR)[0, 0].tolist()
-                        
-                        # FIXED: Proper fill mode implementation
-                        if FILL_MODE:
-                            # Create semi-transparent overlay
-                            overlay = result_img.copy()
-                            cv2.fillPoly(overlay, [pts], color)
-                            # Blend with original image (30% fill, 70% original)
-                            cv2.addWeighted(overlay, 0.3, result_img, 0.7, 0, result_img)
-                            # Draw border on top
-                            cv2.drawContours(result_img, [pts], 0, color, self.border_thickness)
-                        else:
-                            # Just draw border
-                            cv2.drawContours(result_img, [pts], 0, color, self.border_thickness)
-                        
-                        # OPTIMIZED: Better text placement
-                        x_vals = pts[:, 0, 0]
-                        y_vals = pts[:, 0, 1]
-                        code_width = max(x_vals) - min(x_vals) if len(x_vals) > 0 else 1
-                        font_scale = max(0.4, min(code_width / 300, 1.0)) * self.font_scale_factor  # Adjusted scale
-                        
-                        text = f"{i+1}: {decoded['type']} - {decoded['data'][:25]}"  # Show more characters
-                        
-                        if len(pts) > 0:
-                            text_x = int(min(x_vals))
-                            
-                            # IMPROVED: Better text positioning
-                            if min(y_vals) > 50:  # Space above
-                                text_y = int(min(y_vals) - 10)
-                            else:  # Place below
-                                text_y = int(max(y_vals) + 25)
-                            
-                            # OPTIMIZED: Better text background
-                            (text_width, text_height), _ = cv2.getTextSize(
-                                text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness=2
-                            )
-                            
-                            # Semi-transparent background
-                            overlay = result_img.copy()
-                            cv2.rectangle(
-                                overlay, 
-                                (text_x - 3, text_y - text_height - 3), 
-                                (text_x + text_width + 3, text_y + 3), 
-                                (255, 255, 255), 
-                                -1
-                            )
-                            cv2.addWeighted(overlay, 0.8, result_img, 0.2, 0, result_img)
-                            
-                            # Draw text
-                            cv2.putText(
-                                result_img, text, (text_x, text_y),
-                                cv2.FONT_HERSHEY_SIMPLEX, font_scale, self.text_color, 2
-                            )
-                except Exception as e:
-                    print(f"Error processing region {i}: {e}")
-                    continue
+def _process_image_in_worker(image_path, comprehensive):
+    """Process one image in a --workers process
+
+    Returns (result, detected code rows, evaluator metrics or None); the parent merges them.
+    """
+    processor = _WORKER_PROCESSOR
+    DETECTED_CODES_LOG.clear()
+    processor.results = []
+    if comprehensive:
+        processor.evaluator.reset_metrics()
+        result = processor.process_image_with_comprehensive_evaluation(image_path)
+        return result, list(DETECTED_CODES_LOG), processor.evaluator.metrics_state()
+    return processor.process_image(image_path), list(DETECTED_CODES_LOG), None
+
+
+class CodeSystemProcessor:
+    def __init__(self):
+        self.detector = CodeDetector()
+        self.recognizer = CodeRecognizer()
+        self.results = []
+        self.evaluator = PerformanceEvaluator(self.detector)  # Add evaluator
+        
+        # Display options
+        self.font_scale_factor = 1.0
+        self.border_thickness = 3
+        self.text_background_opacity = 0.7
+        self.text_color = (0, 0, 255)
+        self.debug_mode = False
+        
+        # OPTIMIZED: BGR colours of the code hues (i * 30) % 180, converted once instead of per region
+        self._palette = [cv2.cvtColor(np.uint8([[[hue, 255, 255]]]), cv2.COLOR_HSV2BGR)[0, 0].tolist()
+                         for hue in range(0, 180, 30)]
+        
+        # NEW: Worker processes for directory runs (1 = process images in this process)
+        self.workers = 1
+        self._worker_pool = None
+        
+        # NEW: Stop decoding an image's regions once this many codes are found (None = decode every region).
+        # Regions come from the detector with direct hits first, then largest first.
+        self.max_codes = None
 
-            processing_time = time.time() - start_time
-            success = len(recognized_codes) > 0
+    def add_detected_code_to_log(self, folder_name, image_name, detected_code, code_type, location):
+        """Add a detected code entry to the global log with type and location"""
+        global DETECTED_CODES_LOG
+        row = (folder_name, image_name, detected_code, code_type, location)
+        DETECTED_CODES_LOG.append(row)
+        if _DETECTED_CODES_CSV_WRITER is not None:
+            _DETECTED_CODES_CSV_WRITER.writerow(row)
+
+    @staticmethod
+    def _safe_eval(fn, *args, name=''):
+        """Run an evaluator call; a failure is logged once instead of breaking image processing"""
+        try:
+            fn(*args)
+        except Exception as eval_error:
+            logger.warning("Warning: %s evaluation failed: %s", name, eval_error)
+
+    @staticmethod
+    def _location_info(box):
+        """OPTIMIZED: Location string (x,y,width,height) of a region box via cv2.boundingRect"""
+        x, y, w, h = cv2.boundingRect(np.asarray(box, dtype=np.int32))
+        # boundingRect counts both edge pixels; report the max - min extent as before
+        return f"({x},{y},{w - 1},{h - 1})"
+
+    def _start_region_decodes(self, detected_regions):
+        """NEW: Start decoding every undecoded region on worker threads when there are more than two
+
+        Returns {region index: future}; an empty dict means the regions are decoded in the loop.
+        With max_codes set the regions are always decoded in the loop, so stopping early leaves
+        no decodes running on the pool.
+        """
+        if self.max_codes:
+            return {}
+        pending = [i for i, region in enumerate(detected_regions) if 'decoded' not in region]
+        if len(pending) <= 2:
+            return {}
+        pool = _region_pool()
+        return {i: pool.submit(self._timed_decode, detected_regions[i]['warped'], detected_regions[i].get('warped_gray'))
+                for i in pending}
+
+    def _timed_decode(self, warped, warped_gray):
+        """Decode one region crop; returns (decoded, seconds spent decoding) - timed where it runs"""
+        decode_start = time.time()
+        decoded = self.recognizer.decode(warped, warped_gray)
+        return decoded, time.time() - decode_start
+
+    def _draw_region_border(self, result_img, pts, color):
+        """Just draw the border of a decoded region"""
+        cv2.drawContours(result_img, [pts], 0, color, self.border_thickness)
+
+    def _draw_region_fill(self, result_img, pts, color):
+        """Blend a semi-transparent fill into the region (30% fill, 70% original), then draw the border on top"""
+        self._fill_polygon(result_img, pts, color)
+        cv2.drawContours(result_img, [pts], 0, color, self.border_thickness)
+
+    def _fill_polygon(self, result_img, pts, color, alpha=0.3):
+        """OPTIMIZED: Blend a filled polygon into result_img using an overlay of its bounding box only"""
+        x, y, w, h = cv2.boundingRect(pts)
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, result_img.shape[1]), min(y + h, result_img.shape[0])
+        if x1 <= x0 or y1 <= y0:
+            return
+        
+        # Pixels outside the polygon are blended with themselves, so only the ROI can change
+        roi = result_img[y0:y1, x0:x1]
+        overlay = roi.copy()
+        cv2.fillPoly(overlay, [pts], color, offset=(-x0, -y0))
+        cv2.addWeighted(overlay, alpha, roi, 1 - alpha, 0, roi)
 
-            # NEW: Enhanced terminal output with type and location
-            if success:
-                if len(recognized_codes) > 1:
-                    for i, code in enumerate(recognized_codes, 1):
-                        # Get location info from the corresponding region
-                        if i <= len(detected_regions):
-                            region_box = detected_regions[i-1]['box']
-                            x_coords = [point[0] for point in region_box]
-                            y_coords = [point[1] for point in region_box]
-                            min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                            min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                            width = max_x - min_x
-                            height = max_y - min_y
-                            location_info = f"({min_x},{min_y},{width},{height})"
-                            print(f"Detected Code {i}: {code['data']} (Type: {code['type']}) at location {location_info}")
-                else:
-                    # Single code detected
-                    code = recognized_codes[0]
-                    if len(detected_regions) > 0:
-                        region_box = detected_regions[0]['box']
-                        x_coords = [point[0] for point in region_box]
-                        y_coords = [point[1] for point in region_box]
-                        min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                        min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                        width = max_x - min_x
-                        height = max_y - min_y
-                        location_info = f"({min_x},{min_y},{width},{height})"
-                        print(f"Detected Code: {code['data']} (Type: {code['type']}) at location {location_info}")
-                    else:
-                        print(f"Detected Code: {code['data']} (Type: {code['type']})")
-            else:
-                print(f"[NO CODE DETECTED] - {image_name}")
+    def _draw_text_labels(self, result_img, text_labels):
+        """OPTIMIZED: Blend all label backgrounds with a single overlay, then draw the text on top"""
+        if not text_labels:
+            return
 
-            result = {
-                'image_path': str(image_path),
-                'detected_regions': len(detected_regions),
-                'recognized_codes': recognized_codes,
-                'success': success,
-                'processing_time': processing_time,
-                'result_image': result_img
-            }
+        # One overlay for every label instead of one full-frame copy per region, covering only
+        # the area spanned by the label backgrounds
+        x0 = max(min(label[1] for label in text_labels) - 3, 0)
+        y0 = max(min(label[2] - label[5] for label in text_labels) - 3, 0)
+        x1 = min(max(label[1] + label[4] for label in text_labels) + 4, result_img.shape[1])
+        y1 = min(max(label[2] for label in text_labels) + 4, result_img.shape[0])
+        if x1 > x0 and y1 > y0:
+            roi = result_img[y0:y1, x0:x1]
+            overlay = roi.copy()
+            for text, text_x, text_y, font_scale, text_width, text_height in text_labels:
+                cv2.rectangle(
+                    overlay,
+                    (text_x - 3 - x0, text_y - text_height - 3 - y0),
+                    (text_x + text_width + 3 - x0, text_y + 3 - y0),
+                    (255, 255, 255),
+                    -1
+                )
+            # Pixels outside the rectangles are identical in both images, so one blend is enough
+            cv2.addWeighted(overlay, 0.8, roi, 0.2, 0, roi)
 
-            self.results.append(result)
-            return result
-        except Exception as e:
-            print(f"Error processing image {image_path}: {e}")
-            return None
+        for text, text_x, text_y, font_scale, _, _ in text_labels:
+            cv2.putText(
+                result_img, text, (text_x, text_y),
+                cv2.FONT_HERSHEY_SIMPLEX, font_scale, self.text_color, 2
+            )
+
+    def process_image(self, image_path, image=None):
+        """Process a single image with FIXED fill mode and better boundaries (image may be preloaded)"""
+        return self._process_core(image_path, image)
 
     def process_image_with_evaluation(self, image_path):
         """Process image and collect comprehensive evaluation data"""
+        return self._process_core(image_path, evaluate=True, log_errors=False)
+
+    def process_image_silent(self, image_path):
+        """Process image silently without evaluation - for basic processing"""
+        return self._process_core(image_path, log_errors=False, keep_result=False)
+
+    def _process_core(self, image_path, image=None, evaluate=False, log_errors=True, keep_result=True):
+        """Shared body of the process_image* methods (image may be preloaded)
+
+        OPTIMIZED: One implementation of detection, decoding, annotation and logging. evaluate=True
+        also updates the evaluator (method comparison and metric tables); log_errors=False drops the
+        error messages and keep_result=False does not add the result to self.results.
+        """
         start_time = time.time()
         
+        # OPTIMIZED: Convert the path to a string once per image
+        image_path_str = str(image_path)
+        
         try:
-            image = cv2.imread(str(image_path))
             if image is None:
+                image = cv2.imread(image_path_str)
+            if image is None:
+                if log_errors:
+                    logger.error("Error loading image: %s", image_path)
                 return None
                 
-            result_img = image.copy()
+            # OPTIMIZED: The frame is copied for drawing only once a code has been decoded
+            result_img = None
             
-            # Standard detection with timing
-            detection_start = time.time()
+            # Standard detection
             detected_regions = self.detector.detect(image)
-            detection_time = time.time() - detection_start
-            
-            # Evaluate method comparison
-            self.evaluator.evaluate_method_comparison(image, image_path)
             
             recognized_codes = []
+            text_labels = []
             total_decode_time = 0
 
             # NEW: Get folder name for logging
-            folder_name = Path(image_path).parent.name
-            image_name = Path(image_path).name
+            folder_name = os.path.basename(os.path.dirname(image_path_str))
+            image_name = os.path.basename(image_path_str)
+
+            # OPTIMIZED: Fill or border drawing is chosen once per image, not per region
+            draw_region = self._draw_region_fill if FILL_MODE else self._draw_region_border
             
+            decode_futures = self._start_region_decodes(detected_regions)
             for i, region in enumerate(detected_regions):
-                try:
-                    warped = region['warped']
-                    box = region['box']
+                # Check if the region already has decoded data from direct detection
+                if 'decoded' in region:
+                    decoded = region['decoded']
+                    decode_time = 0.0  # decoded during detection
+                else:
+                    # OPTIMIZED: Only the recognizer call is guarded; the drawing below cannot fail on a valid region
+                    try:
+                        # Time the recognition for evaluation; pooled decodes are timed on their worker
+                        # thread, so waiting for a result does not count as decoding time
+                        if i in decode_futures:
+                            decoded, decode_time = decode_futures[i].result()
+                        else:
+                            decoded, decode_time = self._timed_decode(region['warped'], region.get('warped_gray'))
+                    except Exception as e:
+                        if log_errors:
+                            logger.error("Error processing region %d: %s", i, e)
+                        continue
+                
+                total_decode_time += decode_time
                     
-                    # Time the recognition process
-                    decode_start = time.time()
+                if not decoded:
+                    continue
+                
+                recognized_codes.append(decoded)
+                
+                # NEW: Calculate bounding box for location info
+                location_info = self._location_info(region['pts'])
+                
+                # NEW: Add detected code to log with type and location
+                self.add_detected_code_to_log(folder_name, image_name, decoded['data'], decoded['type'], location_info)
+                
+                if result_img is None:
+                    result_img = image.copy()
+                pts = region['pts']
+                
+                # Generate a distinct color for each code
+                color = self._palette[i % len(self._palette)]
+                
+                # FIXED: Proper fill mode implementation
+                draw_region(result_img, pts, color)
+                
+                # OPTIMIZED: Better text placement
+                x_min, y_min, box_width, box_height = cv2.boundingRect(pts)
+                code_width = box_width - 1  # max - min x extent
+                font_scale = max(0.4, min(code_width / 300, 1.0)) * self.font_scale_factor  # Adjusted scale
+                
+                text = f"{i+1}: {decoded['type']} - {decoded['data'][:25]}"  # Show more characters
+                
+                if len(pts) > 0:
+                    text_x = x_min
                     
-                    if 'decoded' in region:
-                        decoded = region['decoded']
-                    else:
-                        decoded = self.recognizer.decode(warped)
+                    # IMPROVED: Better text positioning
+                    if y_min > 50:  # Space above
+                        text_y = y_min - 10
+                    else:  # Place below
+                        text_y = y_min + box_height - 1 + 25
                     
-                    decode_time = time.time() - decode_start
-                    total_decode_time += decode_time
+                    # OPTIMIZED: Better text background
+                    (text_width, text_height), _ = cv2.getTextSize(
+                        text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness=2
+                    )
                     
-                    if decoded:
-                        recognized_codes.append(decoded)
-                        
-                        # NEW: Calculate bounding box for location info
-                        x_coords = [point[0] for point in box]
-                        y_coords = [point[1] for point in box]
-                        min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                        min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                        width = max_x - min_x
-                        height = max_y - min_y
-                        location_info = f"({min_x},{min_y},{width},{height})"
-                        
-                        # NEW: Add detected code to log with type and location
-                        self.add_detected_code_to_log(folder_name, image_name, decoded['data'], decoded['type'], location_info)
-                        
-                        # Visualization code
-                        pts = np.array(box, dtype=np.int32).reshape((-1, 1, 2))
-                        color_hue = (i * 30) % 180
-                        color = cv2.cvtColor(np.uint8([[[color_hue, 255, 255]]]), cv2.COLOR_HSV2BGR)[0, 0].tolist()
-                        
-                        if FILL_MODE:
-                            overlay = result_img.copy()
-                            cv2.fillPoly(overlay, [pts], color)
-                            cv2.addWeighted(overlay, 0.3, result_img, 0.7, 0, result_img)
-                            cv2.drawContours(result_img, [pts], 0, color, self.border_thickness)
-                        else:
-                            cv2.drawContours(result_img, [pts], 0, color, self.border_thickness)
-                        
-                        # Add text
-                        x_vals = pts[:, 0, 0]
-                        y_vals = pts[:, 0, 1]
-                        code_width = max(x_vals) - min(x_vals) if len(x_vals) > 0 else 1
-                        font_scale = max(0.4, min(code_width / 300, 1.0)) * self.font_scale_factor
-                        
-                        text = f"{i+1}: {decoded['type']} - {decoded['data'][:25]}"
-                        
-                        if len(pts) > 0:
-                            text_x = int(min(x_vals))
-                            if min(y_vals) > 50:
-                                text_y = int(min(y_vals) - 10)
-                            else:
-                                text_y = int(max(y_vals) + 25)
-                            
-                            (text_width, text_height), _ = cv2.getTextSize(
-                                text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness=2
-                            )
-                            
-                            overlay = result_img.copy()
-                            cv2.rectangle(
-                                overlay, 
-                                (text_x - 3, text_y - text_height - 3), 
-                                (text_x + text_width + 3, text_y + 3), 
-                                (255, 255, 255), 
-                                -1
-                            )
-                            cv2.addWeighted(overlay, 0.8, result_img, 0.2, 0, result_img)
-                            
-                            cv2.putText(
-                                result_img, text, (text_x, text_y),
-                                cv2.FONT_HERSHEY_SIMPLEX, font_scale, self.text_color, 2
-                            )
-                            
-                except Exception as e:
-                    continue
-            
+                    # OPTIMIZED: Queue label; backgrounds are blended once after the loop
+                    text_labels.append((text, text_x, text_y, font_scale, text_width, text_height))
+                
+                if self.max_codes and len(recognized_codes) >= self.max_codes:
+                    break
+
+            if result_img is None:
+                result_img = image  # Nothing was drawn
+            self._draw_text_labels(result_img, text_labels)
+
+            # SAFER EVALUATION: Method comparison reuses the regions/codes found above
+            if evaluate:
+                self._safe_eval(self.evaluator.evaluate_method_comparison, image, image_path,
+                                detected_regions, recognized_codes, name='Method comparison')
+
             processing_time = time.time() - start_time
             success = len(recognized_codes) > 0
 
             # NEW: Enhanced terminal output with type and location
-            if success:
-                if len(recognized_codes) > 1:
-                    for i, code in enumerate(recognized_codes, 1):
-                        # Get location info from the corresponding region
-                        if i <= len(detected_regions):
-                            region_box = detected_regions[i-1]['box']
-                            x_coords = [point[0] for point in region_box]
-                            y_coords = [point[1] for point in region_box]
-                            min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                            min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                            width = max_x - min_x
-                            height = max_y - min_y
-                            location_info = f"({min_x},{min_y},{width},{height})"
-                            print(f"Detected Code {i}: {code['data']} (Type: {code['type']}) at location {location_info}")
-                else:
-                    # Single code detected
-                    code = recognized_codes[0]
-                    if len(detected_regions) > 0:
-                        region_box = detected_regions[0]['box']
-                        x_coords = [point[0] for point in region_box]
-                        y_coords = [point[1] for point in region_box]
-                        min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                        min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                        width = max_x - min_x
-                        height = max_y - min_y
-                        location_info = f"({min_x},{min_y},{width},{height})"
-                        print(f"Detected Code: {code['data']} (Type: {code['type']}) at location {location_info}")
+            # OPTIMIZED: Skip building the messages entirely when INFO output is disabled (--quiet)
+            if logger.isEnabledFor(logging.INFO):
+                if success:
+                    if len(recognized_codes) > 1:
+                        for i, code in enumerate(recognized_codes, 1):
+                            # Get location info from the corresponding region
+                            if i <= len(detected_regions):
+                                region_box = detected_regions[i-1]['pts']
+                                location_info = self._location_info(region_box)
+                                logger.info("Detected Code %d: %s (Type: %s) at location %s", i, code['data'], code['type'], location_info)
                     else:
-                        print(f"Detected Code: {code['data']} (Type: {code['type']})")
-            else:
-                print(f"[NO CODE DETECTED] - {image_name}")
+                        # Single code detected
+                        code = recognized_codes[0]
+                        if len(detected_regions) > 0:
+                            region_box = detected_regions[0]['pts']
+                            location_info = self._location_info(region_box)
+                            logger.info("Detected Code: %s (Type: %s) at location %s", code['data'], code['type'], location_info)
+                        else:
+                            logger.info("Detected Code: %s (Type: %s)", code['data'], code['type'])
+                else:
+                    logger.info("[NO CODE DETECTED] - %s", image_name)
 
             result = {
-                'image_path': str(image_path),
+                'image_path': image_path_str,
                 'detected_regions': len(detected_regions),
                 'recognized_codes': recognized_codes,
                 'success': success,
@@ -2191,156 +2728,72 @@ class CodeSystemProcessor:
                 'result_image': result_img
             }
 
-            # Comprehensive evaluation
-            self.evaluator.evaluate_detection_performance(image_path, result, processing_time)
-            self.evaluator.evaluate_segmentation_accuracy(image_path, result)
-            self.evaluator.evaluate_recognition_success(image_path, result, total_decode_time)
+            # SAFER EVALUATION: One guarded pass updates every metric table
+            if evaluate:
+                self._safe_eval(self.evaluator.evaluate_all, image_path, result, processing_time, total_decode_time,
+                                name='Performance')
 
-            self.results.append(result)
+            if keep_result:
+                self.results.append(result)
             return result
-            
         except Exception as e:
+            if log_errors:
+                logger.error("Error processing image %s: %s", image_path, e)
             return None
 
-    def process_image_silent(self, image_path):
-        """Process image silently without evaluation - for basic processing"""
-        start_time = time.time()
-        
+    @staticmethod
+    def _save_result_image(target_path, result_image):
+        """Write one annotated image and log the outcome"""
         try:
-            image = cv2.imread(str(image_path))
-            if image is None:
-                return None
-                    
-            result_img = image.copy()
-            detected_regions = self.detector.detect(image)
-            recognized_codes = []
-
-            # NEW: Get folder name for logging
-            folder_name = Path(image_path).parent.name
-            image_name = Path(image_path).name
-
-            for i, region in enumerate(detected_regions):
-                try:
-                    warped = region['warped']
-                    box = region['box']
-                    
-                    if 'decoded' in region:
-                        decoded = region['decoded']
-                    else:
-                        decoded = self.recognizer.decode(warped)
-                        
-                    if decoded:
-                        recognized_codes.append(decoded)
-                        
-                        # Calculate bounding box for location info
-                        x_coords = [point[0] for point in box]
-                        y_coords = [point[1] for point in box]
-                        min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                        min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                        width = max_x - min_x
-                        height = max_y - min_y
-                        location_info = f"({min_x},{min_y},{width},{height})"
-                        
-                        # Add detected code to log with type and location
-                        self.add_detected_code_to_log(folder_name, image_name, decoded['data'], decoded['type'], location_info)
-                        
-                        pts = np.array(box, dtype=np.int32).reshape((-1, 1, 2))
-                        
-                        color_hue = (i * 30) % 180
-                        color = cv2.cvtColor(np.uint8([[[color_hue, 255, 255]]]), cv2.COLOR_HSV2BGR)[0, 0].tolist()
-                        
-                        if FILL_MODE:
-                            overlay = result_img.copy()
-                            cv2.fillPoly(overlay, [pts], color)
-                            cv2.addWeighted(overlay, 0.3, result_img, 0.7, 0, result_img)
-                            cv2.drawContours(result_img, [pts], 0, color, self.border_thickness)
-                        else:
-                            cv2.drawContours(result_img, [pts], 0, color, self.border_thickness)
-                        
-                        # Add text
-                        x_vals = pts[:, 0, 0]
-                        y_vals = pts[:, 0, 1]
-                        code_width = max(x_vals) - min(x_vals) if len(x_vals) > 0 else 1
-                        font_scale = max(0.4, min(code_width / 300, 1.0)) * self.font_scale_factor
-                        
-                        text = f"{i+1}: {decoded['type']} - {decoded['data'][:25]}"
-                        
-                        if len(pts) > 0:
-                            text_x = int(min(x_vals))
-                            if min(y_vals) > 50:
-                                text_y = int(min(y_vals) - 10)
-                            else:
-                                text_y = int(max(y_vals) + 25)
-                            
-                            (text_width, text_height), _ = cv2.getTextSize(
-                                text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness=2
-                            )
-                            
-                            overlay = result_img.copy()
-                            cv2.rectangle(
-                                overlay, 
-                                (text_x - 3, text_y - text_height - 3), 
-                                (text_x + text_width + 3, text_y + 3), 
-                                (255, 255, 255), 
-                                -1
-                            )
-                            cv2.addWeighted(overlay, 0.8, result_img, 0.2, 0, result_img)
-                            
-                            cv2.putText(
-                                result_img, text, (text_x, text_y),
-                                cv2.FONT_HERSHEY_SIMPLEX, font_scale, self.text_color, 2
-                            )
-                except:
-                    continue
-
-            processing_time = time.time() - start_time
-            success = len(recognized_codes) > 0
-
-            # NEW: Enhanced terminal output with type and location (silent mode can still log)
-            if success:
-                if len(recognized_codes) > 1:
-                    for i, code in enumerate(recognized_codes, 1):
-                        # Get location info from the corresponding region
-                        if i <= len(detected_regions):
-                            region_box = detected_regions[i-1]['box']
-                            x_coords = [point[0] for point in region_box]
-                            y_coords = [point[1] for point in region_box]
-                            min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                            min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                            width = max_x - min_x
-                            height = max_y - min_y
-                            location_info = f"({min_x},{min_y},{width},{height})"
-                            print(f"Detected Code {i}: {code['data']} (Type: {code['type']}) at location {location_info}")
-                else:
-                    # Single code detected
-                    code = recognized_codes[0]
-                    if len(detected_regions) > 0:
-                        region_box = detected_regions[0]['box']
-                        x_coords = [point[0] for point in region_box]
-                        y_coords = [point[1] for point in region_box]
-                        min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                        min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                        width = max_x - min_x
-                        height = max_y - min_y
-                        location_info = f"({min_x},{min_y},{width},{height})"
-                        print(f"Detected Code: {code['data']} (Type: {code['type']}) at location {location_info}")
-                    else:
-                        print(f"Detected Code: {code['data']} (Type: {code['type']})")
+            if write_image(target_path, result_image):
+                logger.info("  → Saved to: %s", target_path)
             else:
-                print(f"[NO CODE DETECTED] - {image_name}")
-
-            result = {
-                'image_path': str(image_path),
-                'detected_regions': len(detected_regions),
-                'recognized_codes': recognized_codes,
-                'success': success,
-                'processing_time': processing_time,
-                'result_image': result_img
-            }
-
-            return result
-        except:
-            return None
+                logger.warning("  ✗ Failed to save: %s", target_path)
+        except Exception as save_error:
+            logger.warning("  ✗ Save error: %s", save_error)
+
+    def _iter_directory_results(self, image_paths, comprehensive=False):
+        """Yield (image_path, result) for each image path, in order
+
+        NEW: With workers > 1 the images are processed in a pool of worker processes; their
+        results, detected codes and evaluator metrics are merged into this processor.
+        """
+        process = self.process_image_with_comprehensive_evaluation if comprehensive else self.process_image
+        if self.workers <= 1 or len(image_paths) < 2:
+            # OPTIMIZED: The next images are read while the current one is being processed
+            for image_path, image in prefetch_images(image_paths):
+                logger.info("Processing %s", image_path)
+                yield image_path, process(image_path, image)
+            return
+        
+        flush_log()
+        outputs = self._get_worker_pool().map(_process_image_in_worker, image_paths,
+                                              [comprehensive] * len(image_paths), chunksize=4)
+        for image_path, (result, code_rows, metrics) in zip(image_paths, outputs):
+            logger.info("Processing %s", image_path)
+            for row in code_rows:
+                self.add_detected_code_to_log(*row)
+            if metrics is not None:
+                self.evaluator.merge_metrics(metrics)
+            if result:
+                self.results.append(result)
+            yield image_path, result
+
+    def _get_worker_pool(self):
+        """Worker process pool of this processor, started on first use and kept for every folder of the run"""
+        if self._worker_pool is None:
+            # Spawned workers start clean (no copies of this process's threads, log queue or CSV handle)
+            self._worker_pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                    mp_context=multiprocessing.get_context('spawn'),
+                                                    initializer=_init_worker,
+                                                    initargs=(FILL_MODE, logger.getEffectiveLevel(), self.max_codes))
+        return self._worker_pool
+
+    def close_workers(self):
+        """Shut down the worker processes (if any were started)"""
+        if self._worker_pool is not None:
+            self._worker_pool.shutdown()
+            self._worker_pool = None
 
     def process_directory(self, directory_path, output_dir, failure_dir, max_images=None):
             """Process all images in a directory - FIXED: preserve original filenames and folder structure"""
@@ -2348,28 +2801,26 @@ class CodeSystemProcessor:
             os.makedirs(failure_dir, exist_ok=True)
             self.results = []
 
-            image_paths = [
-                p for p in Path(directory_path).glob('**/*')
-                if p.suffix.lower() in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
-            ]
-            if max_images:
-                image_paths = image_paths[:max_images]
+            # OPTIMIZED: os.scandir walk (stops after max_images) instead of globbing every entry
+            image_paths = list(islice(iter_image_paths(directory_path), max_images or None))
 
-            for image_path in image_paths:
-                print(f"Processing {image_path}")
-                result = self.process_image(image_path)
-                if result:
-                    # Use original filename only (no renaming)
-                    filename = image_path.name
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix='imwrite') as writer:
+                for image_path, result in self._iter_directory_results(image_paths):
+                    if result:
+                        # Use original filename only (no renaming)
+                        filename = image_path.name
                     
-                    # Move to appropriate directory based on success/failure
-                    if result['success']:
-                        target_path = Path(output_dir) / filename
-                    else:
-                        target_path = Path(failure_dir) / filename
+                        # Move to appropriate directory based on success/failure
+                        if result['success']:
+                            target_path = Path(output_dir) / filename
+                        else:
+                            target_path = Path(failure_dir) / filename
                     
-                    # Save with original filename
-                    cv2.imwrite(str(target_path), result['result_image'])
+                        # Save with original filename
+                        # OPTIMIZED: Encoding and writing run in the background while the next image is processed
+                        writer.submit(self._save_result_image, target_path, result['result_image'])
+
+            flush_log()
 
             total = len(self.results)
             success_count = sum(1 for r in self.results if r['success'])
@@ -2397,12 +2848,8 @@ class CodeSystemProcessor:
         self.results = []
 
         # COPIED FROM WORKING VERSION: Same image discovery
-        image_paths = [
-            p for p in Path(directory_path).glob('**/*')
-            if p.suffix.lower() in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
-        ]
-        if max_images:
-            image_paths = image_paths[:max_images]
+        # OPTIMIZED: os.scandir walk (stops after max_images) instead of globbing every entry
+        image_paths = list(islice(iter_image_paths(directory_path), max_images or None))
 
         print(f"Processing {len(image_paths)} images with comprehensive evaluation...")
         
@@ -2411,13 +2858,11 @@ class CodeSystemProcessor:
         with tqdm(total=len(image_paths), 
                 desc=f"Processing {Path(directory_path).name}", 
                 unit="img",
-                bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}] {postfix}") as pbar:
+                bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}] {postfix}") as pbar, \
+                ThreadPoolExecutor(max_workers=2, thread_name_prefix='imwrite') as writer:  # all writes finish on exit
 
-            for i, image_path in enumerate(image_paths):
-                print(f"Processing {image_path}")
-                
-                # CRITICAL FIX: Use the SAME processing call as working version, but add evaluation
-                result = self.process_image_with_comprehensive_evaluation(image_path)
+            # CRITICAL FIX: Use the SAME processing call as working version, but add evaluation
+            for i, (image_path, result) in enumerate(self._iter_directory_results(image_paths, comprehensive=True)):
                 
                 if result:
                     # COPIED FROM WORKING VERSION: Same filename and success logic
@@ -2427,19 +2872,14 @@ class CodeSystemProcessor:
                     if result['success']:
                         target_path = Path(output_dir) / filename
                         folder_successful += 1
-                        print(f"✓ SUCCESS: {filename} - {len(result['recognized_codes'])} codes detected")
+                        logger.info("✓ SUCCESS: %s - %d codes detected", filename, len(result['recognized_codes']))
                     else:
                         target_path = Path(failure_dir) / filename
-                        print(f"✗ FAILED: {filename} - No codes detected")
+                        logger.info("✗ FAILED: %s - No codes detected", filename)
                     
                     # COPIED FROM WORKING VERSION: Same file saving
-                    try:
-                        if cv2.imwrite(str(target_path), result['result_image']):
-                            print(f"  → Saved to: {target_path}")
-                        else:
-                            print(f"  ✗ Failed to save: {target_path}")
-                    except Exception as save_error:
-                        print(f"  ✗ Save error: {save_error}")
+                    # OPTIMIZED: Encoding and writing run in the background while the next image is processed
+                    writer.submit(self._save_result_image, target_path, result['result_image'])
                 
                 # Update progress bar
                 pbar.update(1)
@@ -2454,6 +2894,7 @@ class CodeSystemProcessor:
         failure_ratio = 1 - success_ratio
         avg_time = sum(r['processing_time'] for r in self.results) / total if total > 0 else 0
 
+        flush_log()
         print(f"✓ Completed {Path(directory_path).name}: {success_count}/{total} successful ({(success_count/total*100):.1f}%)")
 
         return {
@@ -2466,268 +2907,117 @@ class CodeSystemProcessor:
             'avg_processing_time': avg_time
         }
 
-    def process_image_with_comprehensive_evaluation(self, image_path):
-        """UPDATED: Process image with safer evaluation calls"""
-        global FILL_MODE
-        start_time = time.time()
-        
-        try:
-            image = cv2.imread(str(image_path))
-            if image is None:
-                print(f"Error loading image: {image_path}")
-                return None
-                    
-            result_img = image.copy()
-            
-            # COPIED FROM WORKING VERSION: Same detection call
-            detected_regions = self.detector.detect(image)
-            
-            # SAFER EVALUATION: Wrap in try-catch to prevent breaking main processing
-            try:
-                self.evaluator.evaluate_method_comparison(image, image_path)
-            except Exception as eval_error:
-                print(f"Warning: Method comparison evaluation failed: {eval_error}")
-                # Continue processing even if evaluation fails
-            
-            recognized_codes = []
-            total_decode_time = 0
-
-            # COPIED FROM WORKING VERSION: Same folder/image name extraction
-            folder_name = Path(image_path).parent.name
-            image_name = Path(image_path).name
-
-            # COPIED FROM WORKING VERSION: Same region processing loop
-            for i, region in enumerate(detected_regions):
-                try:
-                    warped = region['warped']
-                    box = region['box']
-                    
-                    # Time the recognition for evaluation
-                    decode_start = time.time()
-                    
-                    # COPIED FROM WORKING VERSION: Same decoding logic
-                    if 'decoded' in region:
-                        decoded = region['decoded']
-                    else:
-                        decoded = self.recognizer.decode(warped)
-                    
-                    decode_time = time.time() - decode_start
-                    total_decode_time += decode_time
-                        
-                    if decoded:
-                        recognized_codes.append(decoded)
-                        
-                        # COPIED FROM WORKING VERSION: Same location calculation
-                        x_coords = [point[0] for point in box]
-                        y_coords = [point[1] for point in box]
-                        min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                        min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                        width = max_x - min_x
-                        height = max_y - min_y
-                        location_info = f"({min_x},{min_y},{width},{height})"
-                        
-                        # COPIED FROM WORKING VERSION: Same logging
-                        self.add_detected_code_to_log(folder_name, image_name, decoded['data'], decoded['type'], location_info)
-                        
-                        # COPIED FROM WORKING VERSION: Same visualization
-                        pts = np.array(box, dtype=np.int32).reshape((-1, 1, 2))
-                        
-                        color_hue = (i * 30) % 180
-                        color = cv2.cvtColor(np.uint8([[[color_hue, 255, 255]]]), cv2.COLOR_HSV2BGR)[0, 0].tolist()
-                        
-                        # COPIED FROM WORKING VERSION: Same fill mode logic
-                        if FILL_MODE:
-                            overlay = result_img.copy()
-                            cv2.fillPoly(overlay, [pts], color)
-                            cv2.addWeighted(overlay, 0.3, result_img, 0.7, 0, result_img)
-                            cv2.drawContours(result_img, [pts], 0, color, self.border_thickness)
-                        else:
-                            cv2.drawContours(result_img, [pts], 0, color, self.border_thickness)
-                        
-                        # COPIED FROM WORKING VERSION: Same text rendering
-                        x_vals = pts[:, 0, 0]
-                        y_vals = pts[:, 0, 1]
-                        code_width = max(x_vals) - min(x_vals) if len(x_vals) > 0 else 1
-                        font_scale = max(0.4, min(code_width / 300, 1.0)) * self.font_scale_factor
-                        
-                        text = f"{i+1}: {decoded['type']} - {decoded['data'][:25]}"
-                        
-                        if len(pts) > 0:
-                            text_x = int(min(x_vals))
-                            
-                            if min(y_vals) > 50:
-                                text_y = int(min(y_vals) - 10)
-                            else:
-                                text_y = int(max(y_vals) + 25)
-                            
-                            (text_width, text_height), _ = cv2.getTextSize(
-                                text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness=2
-                            )
-                            
-                            overlay = result_img.copy()
-                            cv2.rectangle(
-                                overlay, 
-                                (text_x - 3, text_y - text_height - 3), 
-                                (text_x + text_width + 3, text_y + 3), 
-                                (255, 255, 255), 
-                                -1
-                            )
-                            cv2.addWeighted(overlay, 0.8, result_img, 0.2, 0, result_img)
-                            
-                            cv2.putText(
-                                result_img, text, (text_x, text_y),
-                                cv2.FONT_HERSHEY_SIMPLEX, font_scale, self.text_color, 2
-                            )
-                except Exception as e:
-                    print(f"Error processing region {i}: {e}")
-                    continue
-
-            processing_time = time.time() - start_time
-            success = len(recognized_codes) > 0
-
-            # COPIED FROM WORKING VERSION: Same terminal output
-            if success:
-                if len(recognized_codes) > 1:
-                    for i, code in enumerate(recognized_codes, 1):
-                        if i <= len(detected_regions):
-                            region_box = detected_regions[i-1]['box']
-                            x_coords = [point[0] for point in region_box]
-                            y_coords = [point[1] for point in region_box]
-                            min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                            min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                            width = max_x - min_x
-                            height = max_y - min_y
-                            location_info = f"({min_x},{min_y},{width},{height})"
-                            print(f"Detected Code {i}: {code['data']} (Type: {code['type']}) at location {location_info}")
-                else:
-                    code = recognized_codes[0]
-                    if len(detected_regions) > 0:
-                        region_box = detected_regions[0]['box']
-                        x_coords = [point[0] for point in region_box]
-                        y_coords = [point[1] for point in region_box]
-                        min_x, max_x = int(min(x_coords)), int(max(x_coords))
-                        min_y, max_y = int(min(y_coords)), int(max(y_coords))
-                        width = max_x - min_x
-                        height = max_y - min_y
-                        location_info = f"({min_x},{min_y},{width},{height})"
-                        print(f"Detected Code: {code['data']} (Type: {code['type']}) at location {location_info}")
-                    else:
-                        print(f"Detected Code: {code['data']} (Type: {code['type']})")
-            else:
-                print(f"[NO CODE DETECTED] - {image_name}")
-
-            # COPIED FROM WORKING VERSION: Same result structure
-            result = {
-                'image_path': str(image_path),
-                'detected_regions': len(detected_regions),
-                'recognized_codes': recognized_codes,
-                'success': success,
-                'processing_time': processing_time,
-                'result_image': result_img
-            }
-
-            # SAFER EVALUATION: Wrap each evaluation call in try-catch
-            try:
-                self.evaluator.evaluate_detection_performance(image_path, result, processing_time)
-            except Exception as eval_error:
-                print(f"Warning: Detection performance evaluation failed: {eval_error}")
-                
-            try:
-                self.evaluator.evaluate_segmentation_accuracy(image_path, result)
-            except Exception as eval_error:
-                print(f"Warning: Segmentation evaluation failed: {eval_error}")
-                
-            try:
-                self.evaluator.evaluate_recognition_success(image_path, result, total_decode_time)
-            except Exception as eval_error:
-                print(f"Warning: Recognition evaluation failed: {eval_error}")
-
-            self.results.append(result)
-            return result
-            
-        except Exception as e:
-            print(f"Error processing image {image_path}: {e}")
-            return None
+    def process_image_with_comprehensive_evaluation(self, image_path, image=None):
+        """UPDATED: Process image with safer evaluation calls (image may be preloaded)"""
+        return self._process_core(image_path, image, evaluate=True)
 
-    def evaluate_performance(self, directory_path, max_images=None):
-        """Evaluate detection performance on a directory of images"""
-        image_paths = [
-            p for p in Path(directory_path).glob('**/*')
-            if p.suffix.lower() in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
-        ]
+    def evaluate_performance(self, directory_path, max_images=None, use_cache=False):
+        """Evaluate detection performance on a directory of images (optionally reusing cached results)"""
+        # OPTIMIZED: Stream paths so processing starts before the directory walk finishes
+        image_paths = iter_image_paths(directory_path)
         if max_images:
-            image_paths = image_paths[:max_images]
+            image_paths = islice(image_paths, max_images)
         
-        total_images = len(image_paths)
+        total_images = 0
         total_success = 0
         total_processing_time = 0
+        cached_images = 0  # results reused from the cache (their stored timings are not re-measured)
         detection_counts = []
         
-        for image_path in image_paths:
-            print(f"Evaluating {image_path}")
-            result = self.process_image(image_path)
-            
-            if result:
-                total_processing_time += result['processing_time']
-                if result['success']:
-                    total_success += 1
-                detection_counts.append(len(result['recognized_codes']))
+        # OPTIMIZED: Reuse results of unchanged images from previous runs
+        cache = shelve.open(RESULT_CACHE_FILE) if use_cache else None
         
+        try:
+            # OPTIMIZED: The next images are read while the current one is being processed. With the
+            # cache only the file bytes are prefetched: they are hashed once and decoded on a miss only
+            read = _read_image_bytes if cache is not None else None
+            for image_path, image in prefetch_images(image_paths, read=read):
+                total_images += 1
+                logger.info("Evaluating %s", image_path)
+                from_cache = False
+                
+                if cache is not None:
+                    image_bytes = image
+                    cache_key = _result_cache_key(image_bytes, self.max_codes) if image_bytes is not None else None
+                    result = cache.get(cache_key) if cache_key is not None else None
+                    from_cache = result is not None
+                    if from_cache:
+                        cached_images += 1
+                    else:
+                        image = None
+                        if image_bytes is not None:
+                            image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+                        result = self.process_image(image_path, image)
+                        if result and cache_key is not None:
+                            # The annotated image is not needed for the statistics below
+                            cache[cache_key] = {k: v for k, v in result.items() if k != 'result_image'}
+                else:
+                    result = self.process_image(image_path, image)
+                
+                if result:
+                    if not from_cache:
+                        total_processing_time += result['processing_time']
+                    if result['success']:
+                        total_success += 1
+                    detection_counts.append(len(result['recognized_codes']))
+        finally:
+            if cache is not None:
+                cache.close()
+        
+        # Only images processed in this run count towards the timing
+        measured_images = total_images - cached_images
         success_rate = total_success / total_images if total_images > 0 else 0
-        avg_processing_time = total_processing_time / total_images if total_images > 0 else 0
+        avg_processing_time = total_processing_time / measured_images if measured_images > 0 else 0
         avg_detections = sum(detection_counts) / total_images if total_images > 0 else 0
         
+        flush_log()
         print(f"Performance Evaluation Results:")
         print(f"Total images: {total_images}")
+        if use_cache:
+            print(f"Results from cache: {cached_images} (not included in the processing time)")
         print(f"Success rate: {success_rate:.2%}")
-        print(f"Average processing time: {avg_processing_time:.4f} seconds")
+        if measured_images > 0:
+            print(f"Average processing time: {avg_processing_time:.4f} seconds")
+        else:
+            print("Average processing time: n/a (all results from cache)")
         print(f"Average detections per image: {avg_detections:.2f}")
         
         return {
             'total_images': total_images,
+            'cached_images': cached_images,
             'success_rate': success_rate,
             'avg_processing_time': avg_processing_time,
             'avg_detections': avg_detections
         }   
 
-    def add_detected_code_to_log(self, folder_name, image_name, detected_code, code_type, location):
-        """Add a detected code entry to the global log with type and location"""
-        global DETECTED_CODES_LOG
-        DETECTED_CODES_LOG.append([folder_name, image_name, detected_code, code_type, location])    
-    
 
-def export_detected_codes_to_excel():
-    """Export all detected codes to Excel file with 5 columns: Folder Name, Image Name, Detected Code, Code Type, Location"""
+def export_detected_codes_to_excel(report=print):
+    """Export all detected codes to Excel file with 5 columns: Folder Name, Image Name, Detected Code, Code Type, Location
+
+    Status lines go to report (print by default).
+    """
     global DETECTED_CODES_LOG
     
     if not DETECTED_CODES_LOG:
-        print("No detected codes to export.")
+        report("No detected codes to export.")
         return None
     
     try:
         # Generate filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d")
-        filename = f"detected_codes_log_{timestamp}.xlsx"
-        
-        # Create temporary evaluator instance to use universal methods
-        temp_evaluator = PerformanceEvaluator()
-        
-        # Export using unified approach
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            # Add both summary and detailed sheets
-            temp_evaluator._add_detected_codes_sheets(writer)
+        filename = _export_path(f"detected_codes_log_{timestamp}.xlsx")
         
-        # Auto-fit using universal method
-        temp_evaluator._auto_fit_excel_sheets_with_formatting(filename)
+        # OPTIMIZED: Universal methods are static - no throwaway evaluator instance needed
+        PerformanceEvaluator._write_workbook(filename, PerformanceEvaluator._detected_codes_sheets())
         
-        print(f"\n✓ Detected codes exported to: {filename}")
-        print(f"✓ Total entries: {len(DETECTED_CODES_LOG)}")
-        print(f"✓ Includes both summary and detailed sheets with auto-fit")
+        report(f"\n✓ Detected codes exported to: {filename}")
+        report(f"✓ Total entries: {len(DETECTED_CODES_LOG)}")
+        report(f"✓ Includes both summary and detailed sheets with auto-fit")
         
         return filename
         
     except Exception as e:
-        print(f"Error exporting detected codes to Excel: {e}")
+        report(f"Error exporting detected codes to Excel: {e}")
         return None
 
 def create_directory_structure():
@@ -2745,9 +3035,12 @@ def create_directory_structure():
     return dataset_dir, final_results_dir, failure_dir
 
 
-def run_evaluation(dataset_dir, final_results_dir, failure_dir, max_images=None, selected_folders=None):
+def run_evaluation(dataset_dir, final_results_dir, failure_dir, max_images=None, selected_folders=None, workers=1,
+                   max_codes=None):
     """Run evaluation on the dataset and generate statistics"""
     processor = CodeSystemProcessor()
+    processor.workers = workers
+    processor.max_codes = max_codes
     subdirs = ["BarCode", "QRCode", "BarCode-QRCode"]
     if selected_folders:
         subdirs = [d for d in subdirs if d in selected_folders]
@@ -2760,6 +3053,8 @@ def run_evaluation(dataset_dir, final_results_dir, failure_dir, max_images=None,
         print(f"\nProcessing folder: {subdir}")
         stats = processor.process_directory(input_dir, output_dir, failure_subdir, max_images)
         results.append(stats)
+    
+    processor.close_workers()
 
     df = pd.DataFrame(results)
     df['Success ratio'] = df['success_ratio'].apply(lambda x: f"{x*100:.2f}%")
@@ -2788,15 +3083,12 @@ def run_evaluation(dataset_dir, final_results_dir, failure_dir, max_images=None,
 
     # Export main results and detected codes using UNIFIED approach
     try:
-        with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-            # Main evaluation results
-            df_export.to_excel(writer, sheet_name='Evaluation Results', index=False)
-            
-            # Add detected codes sheets using universal method
-            processor.evaluator._add_detected_codes_sheets(writer)
-        
-        # Auto-fit using universal method
-        processor.evaluator._auto_fit_excel_sheets_with_formatting(excel_path)
+        # Main evaluation results, then the detected codes sheets (universal method)
+        results_sheet = ('Evaluation Results', list(df_export.columns),
+                         list(df_export.itertuples(index=False, name=None)), {}, False)
+        PerformanceEvaluator._write_workbook(
+            excel_path, chain((results_sheet,), PerformanceEvaluator._detected_codes_sheets())
+        )
         
         print(f"\nEvaluation results exported to {excel_path}")
         global DETECTED_CODES_LOG
@@ -2806,9 +3098,12 @@ def run_evaluation(dataset_dir, final_results_dir, failure_dir, max_images=None,
         print(f"Error exporting to Excel: {e}")
 
 
-def run_comprehensive_evaluation(dataset_dir, final_results_dir, failure_dir, max_images=None, selected_folders=None):
+def run_comprehensive_evaluation(dataset_dir, final_results_dir, failure_dir, max_images=None, selected_folders=None,
+                                 report_format='xlsx', workers=1, max_codes=None):
     """COMPLETELY FIXED: Run comprehensive evaluation using EXACT same logic as working normal mode"""
     processor = CodeSystemProcessor()
+    processor.workers = workers
+    processor.max_codes = max_codes
     subdirs = ["BarCode", "QRCode", "BarCode-QRCode"]
     if selected_folders:
         subdirs = [d for d in subdirs if d in selected_folders]
@@ -2816,6 +3111,9 @@ def run_comprehensive_evaluation(dataset_dir, final_results_dir, failure_dir, ma
     # Reset evaluator once for the entire run
     processor.evaluator.reset_metrics()
     
+    # NEW: Mirror detected codes to CSV while processing (kept even if the run is interrupted)
+    csv_codes_file = open_detected_codes_csv()
+    
     # Track overall statistics
     total_processed = 0
     total_successful = 0
@@ -2837,16 +3135,29 @@ def run_comprehensive_evaluation(dataset_dir, final_results_dir, failure_dir, ma
             all_results.append(folder_stats)
             total_processed += folder_stats['total_images']
             total_successful += folder_stats['successful_images']
+    
+    processor.close_workers()
 
-    # Calculate and display consolidated metrics
+    # Calculate consolidated metrics
     evaluation_results = processor.evaluator.calculate_metrics()
-    processor.evaluator.print_performance_tables(evaluation_results)
     
-    # Export to Excel
-    excel_file = processor.evaluator.export_results_to_excel(evaluation_results)
+    # OPTIMIZED: Write both reports in the background while the tables are printed; their status
+    # lines are collected and printed afterwards in a fixed order so they never interleave the tables
+    excel_messages, excel_codes_messages = [], []
+    with ThreadPoolExecutor(max_workers=2) as export_pool:
+        excel_future = export_pool.submit(processor.evaluator.export_results, evaluation_results,
+                                          report_format=report_format, report=excel_messages.append)
+        excel_codes_future = export_pool.submit(export_detected_codes_to_excel, report=excel_codes_messages.append)
+        
+        processor.evaluator.print_performance_tables(evaluation_results)
+        
+        excel_file = excel_future.result()
+        excel_codes_file = excel_codes_future.result()
     
-    # # Export detected codes to Excel
-    excel_codes_file = export_detected_codes_to_excel()
+    for message in chain(excel_messages, excel_codes_messages):
+        print(message)
+    
+    close_detected_codes_csv()
     
     # Print final summary
     success_rate = (total_successful / total_processed * 100) if total_processed > 0 else 0
@@ -2858,6 +3169,8 @@ def run_comprehensive_evaluation(dataset_dir, final_results_dir, failure_dir, ma
         print(f"Results exported to: {excel_file}")
     if excel_codes_file:
         print(f"Detected codes log exported to: {excel_codes_file}")
+    if csv_codes_file:
+        print(f"Detected codes streamed to: {csv_codes_file}")
 
     return {
         'total_processed': total_processed,
@@ -2868,29 +3181,17 @@ def run_comprehensive_evaluation(dataset_dir, final_results_dir, failure_dir, ma
         'detected_codes_excel': excel_codes_file
     }
 
-def determine_image_category(self, image_path):
-    """Fixed category determination for your folder structure"""
-    path_str = str(image_path).lower()
-    parent_dir = str(Path(image_path).parent).lower()
-    
-    # Check for your specific folder names (case insensitive)
-    if 'barcode-qrcode' in parent_dir or 'barcode-qrcode' in path_str:
-        return 'Both Barcode-QRCode'
-    elif 'barcode' in parent_dir and 'qrcode' not in parent_dir:
-        return 'Barcode'
-    elif 'qrcode' in parent_dir and 'barcode' not in parent_dir:
-        return 'QR Code'
-    
-    # Additional checks for path patterns
-    if 'barcode-qrcode' in path_str or ('barcode' in path_str and 'qrcode' in path_str):
-        return 'Both Barcode-QRCode'
-    elif 'barcode' in path_str and 'qrcode' not in path_str:
-        return 'Barcode'
-    elif 'qrcode' in path_str and 'barcode' not in path_str:
-        return 'QR Code'
-    
-    # # Final fallback - try to infer from file patterns
-    return 'Barcode'
+
+def positive_int(value):
+    """argparse type for options that must be a whole number of at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
 
 def main():
     """Enhanced main function with comprehensive evaluation option"""
@@ -2902,9 +3203,19 @@ def main():
     parser.add_argument('--performance_test', action='store_true', help='Run performance evaluation on dataset')
     parser.add_argument('--comprehensive', action='store_true', help='Run comprehensive evaluation with all performance tables (Tables 1,2,4,5)')
     parser.add_argument('--test_image', type=str, default=None, help='Process a single test image')
+    parser.add_argument('--cache', action='store_true', help='Reuse cached results for unchanged images in the performance test')
+    parser.add_argument('--quiet', action='store_true', help='Suppress per-image progress messages')
+    parser.add_argument('--report_format', choices=PerformanceEvaluator.REPORT_FORMATS, default='xlsx',
+                        help='File format of the comprehensive evaluation tables (parquet/feather need pyarrow)')
+    parser.add_argument('--max_codes', type=positive_int, default=None,
+                        help='Stop decoding an image once this many codes are found (default: decode every region)')
+    parser.add_argument('--workers', type=positive_int, default=1,
+                        help='Number of worker processes for dataset folders (default: 1, no extra processes)')
     
     args = parser.parse_args()
     
+    configure_logging(logging.WARNING if args.quiet else logging.INFO)
+    
     # Set global fill mode
     FILL_MODE = args.fill
     if FILL_MODE:
@@ -2916,13 +3227,15 @@ def main():
         # Process a single test image with evaluation
         if args.comprehensive:
             processor = CodeSystemProcessor()
+            processor.max_codes = args.max_codes
             test_path = Path(args.test_image)
             if test_path.exists():
                 print(f"Processing test image with comprehensive evaluation: {test_path}")
                 result = processor.process_image_with_evaluation(test_path)
+                flush_log()
                 if result:
                     output_path = test_path.parent / f"{test_path.stem}_comprehensive_result{test_path.suffix}"
-                    cv2.imwrite(str(output_path), result['result_image'])
+                    write_image(output_path, result['result_image'])
                     print(f"✓ Result saved to {output_path}")
                     print(f"✓ Detected {len(result['recognized_codes'])} codes in {result['processing_time']:.3f} seconds")
                     
@@ -2939,13 +3252,15 @@ def main():
         else:
             # Use original processor for single image
             processor = CodeSystemProcessor()
+            processor.max_codes = args.max_codes
             test_path = Path(args.test_image)
             if test_path.exists():
                 print(f"Processing test image: {test_path}")
                 result = processor.process_image(test_path)
+                flush_log()
                 if result:
                     output_path = test_path.parent / f"{test_path.stem}_result{test_path.suffix}"
-                    cv2.imwrite(str(output_path), result['result_image'])
+                    write_image(output_path, result['result_image'])
                     print(f"✓ Result saved to {output_path}")
                     print(f"✓ Detected {len(result['recognized_codes'])} codes in {result['processing_time']:.3f} seconds")
                     
@@ -2966,24 +3281,27 @@ def main():
         else:
             print("Processing all folders: BarCode, QRCode, BarCode-QRCode")
         
-        run_comprehensive_evaluation(dataset_dir, final_results_dir, failure_dir, args.max_images, args.folders)
+        run_comprehensive_evaluation(dataset_dir, final_results_dir, failure_dir, args.max_images, args.folders,
+                                     args.report_format, args.workers, args.max_codes)
         
     elif args.performance_test:
         # Run performance evaluation
         dataset_dir, _, _ = create_directory_structure()
         processor = CodeSystemProcessor()
+        processor.max_codes = args.max_codes
         if args.folders:
             for folder in args.folders:
                 folder_path = dataset_dir / folder
                 print(f"\nRunning performance test on {folder}")
-                processor.evaluate_performance(folder_path, args.max_images)
+                processor.evaluate_performance(folder_path, args.max_images, args.cache)
         else:
             print("\nRunning performance test on all folders")
-            processor.evaluate_performance(dataset_dir, args.max_images)
+            processor.evaluate_performance(dataset_dir, args.max_images, args.cache)
     else:
         # Standard evaluation run (original functionality)
         dataset_dir, final_results_dir, failure_dir = create_directory_structure()
-        run_evaluation(dataset_dir, final_results_dir, failure_dir, args.max_images, args.folders)
+        run_evaluation(dataset_dir, final_results_dir, failure_dir, args.max_images, args.folders, args.workers,
+                       args.max_codes)
 
 
 if __name__ == "__main__":